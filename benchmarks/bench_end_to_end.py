@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Benchmark de punta a punta sin red: scraper completo contra el servidor VTEX local
+
+Levanta benchmarks/vtex_stub_server.py en un hilo y ejecuta, cada uno en su
+propio proceso (para medir su memoria por separado):
+
+- adapter: ExitoScraperAdapter + ScrapeCategoryUseCase + JSONL, con el mismo
+  limitador adaptativo que la CLI (arranque incluido, tope en --max-rps)
+- cli: python -m exito_scraper.main scrape ... tal como lo corre un usuario
+
+Reporta productos/s, latencia de página p50/p95 (desde que se pide una página
+hasta que se entrega su último producto) y RSS máximo. Los resultados se
+guardan en benchmarks/results/ y se comparan con la corrida anterior del
+mismo escenario: si productos/s cae o p95 sube más de --umbral, sale con 1.
+
+Uso:
+    python benchmarks/bench_end_to_end.py [--modo adapter|cli|ambos] [--paginas 6] [--workers 4]
+        [--latency 0.05] [--jitter 0.02] [--error-rate 0.02] [--total 600] [--fixtures DIR]
+        [--ratings 10] [--max-rps 50] [--umbral 0.15] [--no-guardar]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from vtex_stub_server import make_server
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DATA_DIR = ROOT / "exito_scraper" / "data"
+OUTPUT_PREFIX = "_bench_"
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentil por rango más cercano (q en 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class _TimedScraper:
+    """Envuelve el scraper y mide cada página hasta que se consume su último producto."""
+
+    def __init__(self, scraper):
+        self._scraper = scraper
+        self.latencies: List[float] = []
+
+    def __getattr__(self, name):
+        return getattr(self._scraper, name)
+
+    def scrape(self, categoria: str, page: int):
+        start = time.perf_counter()
+        productos = self._scraper.scrape(categoria, page)
+
+        def timed():
+            yield from productos
+            self.latencies.append(time.perf_counter() - start)
+
+        return timed()
+
+
+def _run_adapter(args) -> dict:
+    """Proceso hijo del modo adapter (EXITO_BASE_HOST ya apunta al servidor local)."""
+    from exito_scraper.adapters.exito_scraper_adapter import ExitoScraperAdapter
+    from exito_scraper.adapters.json_repo import JsonRepositoryAdapter
+    from exito_scraper.adapters.rate_limiter import AdaptiveRateLimiter
+    from exito_scraper.application.scrape_usecase import ScrapeCategoryUseCase
+
+    # Mismo limitador que main._make_scraper: se mide también su fase de arranque
+    limiter = AdaptiveRateLimiter(max_rate=args.max_rps)
+    scraper = _TimedScraper(ExitoScraperAdapter(rating_limit=args.ratings, rate_limiter=limiter,
+                                                pool_size=max(args.workers, 10), max_per_host=max(args.workers, 4)))
+    repo = JsonRepositoryAdapter(f"{OUTPUT_PREFIX}adapter.jsonl", generate_formatted=False)
+    start = time.perf_counter()
+    ScrapeCategoryUseCase(scraper, repo, workers=args.workers).run(args.categoria, pages=args.paginas)
+    return {"productos": repo._persisted, "segundos": time.perf_counter() - start,
+            "latencias": scraper.latencies}
+
+
+def _child(mode: str, args, base_url: str) -> dict:
+    """Ejecuta un modo en un proceso aparte y retorna sus métricas (incluido el RSS máximo)."""
+    env = dict(os.environ, EXITO_BASE_HOST=base_url, PYTHONPATH=str(ROOT))
+    if mode == "adapter":
+        cmd = [sys.executable, __file__, "--hijo", json.dumps(vars(args))]
+    else:
+        cmd = [sys.executable, "-m", "exito_scraper.main", "scrape", "--categoria", args.categoria,
+               "--paginas", str(args.paginas), "--output", f"{OUTPUT_PREFIX}cli.jsonl",
+               "--workers", str(args.workers), "--ratings", str(args.ratings), "--max-rps", str(args.max_rps),
+               "--report", str(DATA_DIR / f"{OUTPUT_PREFIX}cli.report.json")]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    output = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        print(output)
+        raise RuntimeError(f"El modo {mode} terminó con código {proc.returncode}")
+
+    if mode == "adapter":
+        result = json.loads(output.strip().splitlines()[-1])
+    else:
+        with (DATA_DIR / f"{OUTPUT_PREFIX}cli.jsonl").open(encoding="utf-8") as f:
+            result = {"productos": sum(1 for line in f if line.strip()), "segundos": elapsed, "latencias": []}
+        # La latencia de página sale del reporte de la corrida (etapa "page")
+        report = json.loads((DATA_DIR / f"{OUTPUT_PREFIX}cli.report.json").read_text(encoding="utf-8"))
+        page = report["histograms"].get("stage_seconds{stage=page}", {})
+        result.update(p50=page.get("p50"), p95=page.get("p95"), paginas=page.get("count", 0))
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    latencies = result.pop("latencias")
+    if latencies:
+        result.update(p50=percentile(latencies, 50), p95=percentile(latencies, 95), paginas=len(latencies))
+    return {
+        "productos": result["productos"],
+        "segundos": round(result["segundos"], 3),
+        "productos_por_segundo": round(result["productos"] / result["segundos"], 2) if result["segundos"] else None,
+        "paginas_medidas": result.get("paginas", 0),
+        "p50_pagina_ms": _ms(result.get("p50")),
+        "p95_pagina_ms": _ms(result.get("p95")),
+        "rss_max_mb": round(rss_mb, 1),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def _cleanup() -> None:
+    for path in DATA_DIR.glob(f"{OUTPUT_PREFIX}*"):
+        path.unlink()
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def _previous(escenario: dict) -> Optional[dict]:
+    """Última corrida guardada con el mismo escenario."""
+    for path in sorted(RESULTS_DIR.glob("e2e-*.json"), reverse=True):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if data.get("escenario") == escenario:
+            data["archivo"] = path.name
+            return data
+    return None
+
+
+def _regressions(actual: dict, anterior: dict, umbral: float) -> List[str]:
+    found = []
+    for mode, now in actual.items():
+        before = anterior.get(mode)
+        if not before:
+            continue
+        if before.get("productos_por_segundo") and now["productos_por_segundo"] is not None:
+            change = now["productos_por_segundo"] / before["productos_por_segundo"] - 1
+            print(f"  {mode}: productos/s {before['productos_por_segundo']} -> {now['productos_por_segundo']} ({change:+.1%})")
+            if change < -umbral:
+                found.append(f"{mode}: productos/s cayó {-change:.1%}")
+        if before.get("p95_pagina_ms") and now["p95_pagina_ms"] is not None:
+            change = now["p95_pagina_ms"] / before["p95_pagina_ms"] - 1
+            print(f"  {mode}: p95 página {before['p95_pagina_ms']} ms -> {now['p95_pagina_ms']} ms ({change:+.1%})")
+            if change > umbral:
+                found.append(f"{mode}: p95 de página subió {change:.1%}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta contra un servidor VTEX local")
+    parser.add_argument("--modo", choices=["adapter", "cli", "ambos"], default="ambos")
+    parser.add_argument("--categoria", default="televisores")
+    parser.add_argument("--paginas", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ratings", type=int, default=10, help="Productos por página con calificación")
+    parser.add_argument("--max-rps", type=float, default=50.0)
+    parser.add_argument("--total", type=int, default=600, help="Productos por categoría en el servidor")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--fixtures", default=None, help="Respuestas grabadas (ver vtex_stub_server.py --record)")
+    parser.add_argument("--umbral", type=float, default=0.15, help="Variación tolerada frente a la corrida anterior")
+    parser.add_argument("--no-guardar", action="store_true", help="No guardar el resultado en benchmarks/results/")
+    parser.add_argument("--hijo", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(_run_adapter(argparse.Namespace(**json.loads(args.hijo)))))
+        return
+
+    server = make_server(args.total, latency=args.latency, jitter=args.jitter,
+                         error_rate=args.error_rate, fixtures=args.fixtures).start()
+    modes = ["adapter", "cli"] if args.modo == "ambos" else [args.modo]
+    escenario = {k: getattr(args, k) for k in ("categoria", "paginas", "workers", "ratings", "max_rps",
+                                               "total", "latency", "jitter", "error_rate", "fixtures")}
+    print(f"Servidor local en {server.url}: {escenario}")
+
+    resultados = {}
+    try:
+        for mode in modes:
+            requests_before, errors_before = server.requests, server.errors
+            resultados[mode] = _child(mode, args, server.url)
+            resultados[mode].update(requests=server.requests - requests_before, errores_503=server.errors - errors_before)
+    finally:
+        server.shutdown()
+        _cleanup()
+
+    print(f"\n{'modo':<9}{'productos':>10}{'seg':>9}{'prod/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'RSS MB':>9}{'reqs':>7}{'503':>6}")
+    for mode, r in resultados.items():
+        print(f"{mode:<9}{r['productos']:>10}{r['segundos']:>9.2f}{r['productos_por_segundo'] or 0:>9.1f}"
+              f"{r['p50_pagina_ms'] or '-':>9}{r['p95_pagina_ms'] or '-':>9}{r['rss_max_mb']:>9.1f}"
+              f"{r['requests']:>7}{r['errores_503']:>6}")
+
+    anterior = _previous(escenario)
+    regressions = []
+    if anterior:
+        print(f"\nComparación con {anterior['archivo']} ({anterior.get('git')}):")
+        regressions = _regressions(resultados, anterior["resultados"], args.umbral)
+
+    if not args.no_guardar:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        revision = _git_revision()
+        path = RESULTS_DIR / f"e2e-{datetime.now():%Y%m%d-%H%M%S}-{revision}.json"
+        path.write_text(json.dumps({
+            "fecha": datetime.now().isoformat(timespec="seconds"), "git": revision,
+            "python": platform.python_version(), "escenario": escenario, "resultados": resultados,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nResultado guardado en {path.relative_to(ROOT)}")
+
+    if regressions:
+        print("\nRegresión detectada: " + "; ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: fallback HTML de categoría, lxml + XPath vs BeautifulSoup completo
+
+Uso:
+    python benchmarks/bench_html_fallback.py [directorio_con_paginas_html] [repeticiones]
+
+Si no se indica directorio se generan páginas de categoría sintéticas
+(tarjetas VTEX con anchors repetidos de imagen y título, y scripts grandes
+de estado como en exito.com).
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from exito_scraper.utils.product_cards import dedup_cards, parse_product_cards, parse_product_cards_soup
+
+BASE_HOST = "https://www.exito.com"
+
+
+def _synthetic_page(cards: int) -> str:
+    state = "<script>window.__RUNTIME__ = {" + ",".join(f'"k{i}": "{"x" * 60}"' for i in range(4000)) + "};</script>"
+    nav = "".join(f'<li class="menu-item"><a href="/categoria-{i}">Categoría {i}</a></li>' for i in range(300))
+    body = []
+    for i in range(cards):
+        link = f"/televisor-marca-{i}-55-pulgadas-uhd/p"
+        body.append(
+            f'<section class="vtex-product-summary-2-x-container"><article class="productCard">'
+            f'<a href="{link}?skuId={i}" title="Televisor Marca {i} 55 pulgadas UHD">'
+            f'<img src="https://exitocol.vtexassets.com/arquivos/ids/{i}/tv.jpg" alt="tv"></a>'
+            f'<div class="product-info"><a href="{link}" title="Televisor Marca {i} 55 pulgadas UHD">'
+            f'<h3 class="productName">Televisor Marca {i} 55 pulgadas UHD</h3></a>'
+            f'<div class="price-container"><span class="selling-price">$ {1_000_000 + i * 1000:,}</span>'
+            f'<span class="list-price">$ {1_500_000 + i * 1000:,}</span></div>'
+            f'<span class="badge">Envío gratis</span></div></article></section>'
+        )
+    return f"<html><head>{state}</head><body><nav><ul>{nav}</ul></nav><main>{''.join(body)}</main></body></html>"
+
+
+def _load_pages(directory: str) -> dict:
+    return {p.name: p.read_text(encoding="utf-8", errors="replace") for p in sorted(Path(directory).glob("*.html"))}
+
+
+def _bench(fn, page: str, reps: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reps):
+        fn(page, BASE_HOST)
+    return (time.perf_counter() - start) / reps
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = _load_pages(sys.argv[1])
+    else:
+        pages = {f"sintetica_{n}_tarjetas": _synthetic_page(n) for n in (20, 50, 200)}
+    reps = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    if not pages:
+        print("No se encontraron archivos .html")
+        sys.exit(1)
+
+    print(f"{'página':<24}{'KB':>8}{'soup ms':>11}{'lxml ms':>11}{'speedup':>9}{'anchors':>9}{'productos':>11}")
+    for name, page in pages.items():
+        slow = _bench(parse_product_cards_soup, page, reps)
+        fast = _bench(parse_product_cards, page, reps)
+        soup_items = parse_product_cards_soup(page, BASE_HOST)
+        fast_items = parse_product_cards(page, BASE_HOST)
+        # Misma información que la versión original, sin los anchors repetidos
+        assert fast_items == dedup_cards(soup_items), name
+        print(f"{name[:23]:<24}{len(page) / 1024:>8.0f}{slow * 1000:>11.2f}{fast * 1000:>11.2f}"
+              f"{slow / fast:>8.1f}x{len(soup_items):>9}{len(fast_items):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: limpieza de detalles HTML en una pasada vs pasadas sucesivas
+
+Uso:
+    python benchmarks/bench_html_formatter.py [archivo.json|archivo.jsonl] [repeticiones]
+
+Con archivo se usa el campo detalles_adicionales de cada producto; si no, se
+generan dos corpus sintéticos de 20.000 descripciones (con repeticiones, como
+las fichas de variantes de un mismo modelo): HTML con muchas etiquetas y
+fichas de texto como las que arma el scraper desde la API de VTEX.
+"""
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from exito_scraper.utils.html_formatter import clean_html_details, clean_html_details_sequential
+
+
+def _synthetic_html(n: int = 20000) -> list:
+    random.seed(7)
+    templates = []
+    for t in range(2000):
+        specs = "".join(
+            f"<li><strong>Especificación {i}:</strong> <span class=\"v\">valor {t}-{i}</span></li>"
+            for i in range(random.randint(5, 25))
+        )
+        templates.append(
+            f"<h2>Televisor modelo {t}</h2><p>Descripción <b>destacada</b> del producto &amp; "
+            f"<em>garantía</em> de {t % 5 + 1} años.<br/>Disponible en tienda.</p>"
+            f"<div class=\"specs\"><ul>{specs}</ul></div><p>  Nota:\t<i>imagen de referencia</i>  </p>"
+        )
+    return [random.choice(templates) for _ in range(n)]
+
+
+def _synthetic_fichas(n: int = 20000) -> list:
+    random.seed(7)
+    words = ("pantalla resolución sonido envolvente garantía diseño delgado control "
+             "remoto aplicaciones conectividad").split()
+    templates = []
+    for t in range(2000):
+        desc = " ".join(random.choice(words) for _ in range(120))
+        specs = ". ".join(f"Especificación {i}: valor {t}-{i}" for i in range(15))
+        templates.append(f"Descripción: <p>{desc} <b>{t}</b></p>. Especificaciones: {specs}")
+    return [random.choice(templates) for _ in range(n)]
+
+
+def _load_corpus(path: str) -> list:
+    text = Path(path).read_text(encoding="utf-8")
+    if path.endswith(".jsonl"):
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        rows = json.loads(text)
+    return [r.get("detalles_adicionales_raw") or r.get("detalles_adicionales") or "" for r in rows]
+
+
+def _bench(fn, corpus: list, reps: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reps):
+        for text in corpus:
+            fn(text)
+    return (time.perf_counter() - start) / reps
+
+
+def _run(name: str, corpus: list, reps: int) -> None:
+    mismatches = sum(clean_html_details(t) != clean_html_details_sequential(t) for t in corpus)
+    single_pass = clean_html_details.__wrapped__
+
+    sequential = _bench(clean_html_details_sequential, corpus, reps)
+    single = _bench(single_pass, corpus, reps)
+    clean_html_details.cache_clear()
+    cached = _bench(clean_html_details, corpus, reps)
+
+    kb = sum(len(t) for t in corpus) / 1024
+    print(f"\n{name}: {len(corpus)} descripciones ({len(set(corpus))} distintas, {kb:.0f} KB), {mismatches} diferencias")
+    print(f"{'variante':<16}{'ms total':>12}{'µs/desc':>10}{'speedup':>10}")
+    for label, secs in (("secuencial", sequential), ("una pasada", single), ("memorizada", cached)):
+        print(f"{label:<16}{secs * 1000:>12.1f}{secs / len(corpus) * 1e6:>10.1f}{sequential / secs:>9.1f}x")
+
+
+def main():
+    reps = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    if len(sys.argv) > 1:
+        corpora = {Path(sys.argv[1]).name: _load_corpus(sys.argv[1])}
+    else:
+        corpora = {"html sintético": _synthetic_html(), "fichas sintéticas": _synthetic_fichas()}
+    for name, corpus in corpora.items():
+        if not corpus:
+            print(f"{name}: no se encontraron descripciones")
+            continue
+        _run(name, corpus, reps)
+
+
+if __name__ == "__main__":
+    main()
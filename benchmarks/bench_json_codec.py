@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: codec JSON (orjson / msgspec / librería estándar)
+
+Mide, con cada backend disponible y en un proceso aparte (EXITO_JSON_BACKEND):
+
+- decode: respuestas de búsqueda VTEX desde bytes (lo que hace el adapter con response.content)
+- jsonl: filas de Producto a líneas JSONL en bytes (JsonRepositoryAdapter.persist)
+- pretty: elementos del JSON formateado (format_json.py / _formatted.json)
+
+Uso:
+    python benchmarks/bench_json_codec.py [--paginas 40] [--repeticiones 5] [--fixtures DIR] [--jsonl ARCHIVO]
+
+Sin --fixtures las respuestas salen del catálogo sintético de vtex_stub_server.py
+(--fixtures usa respuestas grabadas con vtex_stub_server.py --record). Con --jsonl
+las filas se leen de una salida real del scraper en lugar de normalizar las respuestas.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+BACKENDS = ("json", "orjson", "msgspec")
+ITEMS_PER_PAGE = 50
+
+
+def _dataset(args) -> tuple:
+    """(cuerpos de respuestas de búsqueda en bytes, filas de productos)."""
+    from vtex_stub_server import StubCatalog, _load_fixtures
+    from exito_scraper.adapters.exito_scraper_adapter import ExitoScraperAdapter
+
+    templates, pages = _load_fixtures(args.fixtures) if args.fixtures else ([], [])
+    catalog = StubCatalog(args.paginas * ITEMS_PER_PAGE, templates, pages)
+    bodies = []
+    for page in range(args.paginas):
+        items, _ = catalog.search("tecnologia/televisores", None, page * ITEMS_PER_PAGE,
+                                  (page + 1) * ITEMS_PER_PAGE - 1)
+        bodies.append(json.dumps(items, ensure_ascii=False).encode("utf-8"))
+
+    if args.jsonl:
+        with open(args.jsonl, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        scraper = ExitoScraperAdapter()
+        rows = [scraper._build_producto(it, i, "televisores", page + 1).as_dict()
+                for page, body in enumerate(bodies) for i, it in enumerate(json.loads(body))]
+    return bodies, rows
+
+
+def _best(fn, reps: int) -> float:
+    best = float("inf")
+    for _ in range(reps):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _run_backend(args) -> dict:
+    """Proceso hijo: EXITO_JSON_BACKEND ya está fijado."""
+    from exito_scraper.utils import json_codec
+
+    bodies, rows = _dataset(args)
+    decoded = [json_codec.loads(body) for body in bodies]
+    assert decoded == [json.loads(body) for body in bodies]
+    lines = b"".join(json_codec.dumps_line(row) for row in rows)
+    assert [json.loads(line) for line in lines.splitlines()] == rows
+
+    return {
+        "backend": json_codec.BACKEND,
+        "decode_mb": sum(len(b) for b in bodies) / 1e6,
+        "jsonl_mb": len(lines) / 1e6,
+        "filas": len(rows),
+        "decode": _best(lambda: [json_codec.loads(body) for body in bodies], args.repeticiones),
+        "jsonl": _best(lambda: b"".join(json_codec.dumps_line(row) for row in rows), args.repeticiones),
+        "pretty": _best(lambda: [json_codec.dumps_pretty(row) for row in rows], args.repeticiones),
+    }
+
+
+def _baseline(args) -> dict:
+    """Código anterior: json.loads(response.text) y json.dumps por línea codificado al final."""
+    bodies, rows = _dataset(args)
+    return {
+        "decode": _best(lambda: [json.loads(body.decode("utf-8")) for body in bodies], args.repeticiones),
+        "jsonl": _best(lambda: "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8"),
+                       args.repeticiones),
+        "pretty": _best(lambda: [json.dumps(row, indent=2, ensure_ascii=False) for row in rows], args.repeticiones),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del codec JSON por backend")
+    parser.add_argument("--paginas", type=int, default=40, help="Respuestas de búsqueda de 50 productos")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--fixtures", default=None, help="Respuestas grabadas (ver vtex_stub_server.py --record)")
+    parser.add_argument("--jsonl", default=None, help="Salida JSONL real del scraper")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(_run_backend(args)))
+        return
+
+    cmd = [sys.executable, __file__, "--hijo", "--paginas", str(args.paginas), "--repeticiones", str(args.repeticiones)]
+    for flag in ("fixtures", "jsonl"):
+        if getattr(args, flag):
+            cmd += [f"--{flag}", getattr(args, flag)]
+
+    base = _baseline(args)
+    results = []
+    for backend in BACKENDS:
+        env = dict(os.environ, EXITO_JSON_BACKEND=backend, PYTHONPATH=str(ROOT))
+        proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stdout + proc.stderr)
+            sys.exit(1)
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if result["backend"] != backend:
+            print(f"{backend}: no instalado, se omite")
+            continue
+        results.append(result)
+
+    first = results[0]
+    print(f"decode: {args.paginas} respuestas VTEX, {first['decode_mb']:.1f} MB; "
+          f"jsonl/pretty: {first['filas']} filas, {first['jsonl_mb']:.1f} MB")
+    print(f"{'backend':<11}{'decode ms':>11}{'MB/s':>8}{'jsonl ms':>11}{'MB/s':>8}{'pretty ms':>11}{'vs anterior':>24}")
+    print(f"{'anterior':<11}{base['decode'] * 1000:>11.1f}{first['decode_mb'] / base['decode']:>8.0f}"
+          f"{base['jsonl'] * 1000:>11.1f}{first['jsonl_mb'] / base['jsonl']:>8.0f}{base['pretty'] * 1000:>11.1f}")
+    for r in results:
+        speedups = "/".join(f"{base[k] / r[k]:.1f}x" for k in ("decode", "jsonl", "pretty"))
+        print(f"{r['backend']:<11}{r['decode'] * 1000:>11.1f}{r['decode_mb'] / r['decode']:>8.0f}"
+              f"{r['jsonl'] * 1000:>11.1f}{r['jsonl_mb'] / r['jsonl']:>8.0f}{r['pretty'] * 1000:>11.1f}"
+              f"{speedups:>24}")
+
+
+if __name__ == "__main__":
+    main()
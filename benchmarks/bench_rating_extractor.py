@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: extracción de calificación rápida vs BeautifulSoup completo
+
+Uso:
+    python benchmarks/bench_rating_extractor.py [directorio_con_paginas_html] [repeticiones]
+
+Si no se indica directorio se generan páginas de producto sintéticas
+(~300 KB, similares en estructura a las de exito.com).
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from exito_scraper.utils.rating_extractor import extract_rating, extract_rating_soup
+
+
+def _synthetic_pages() -> dict:
+    filler = "".join(
+        f'<div class="vtex-flex-layout-0-x-flexRow"><span class="t-body">Item {i} disponible</span>'
+        f'<a href="/producto-{i}/p">Ver producto {i}</a></div>'
+        for i in range(2500)
+    )
+    script = "<script>window.__RUNTIME__ = {" + ",".join(f'"k{i}": "{"x" * 40}"' for i in range(1500)) + "};</script>"
+    json_ld = (
+        '<script type="application/ld+json">{"@context":"https://schema.org","@type":"Product",'
+        '"name":"Televisor LG 55 pulgadas","aggregateRating":{"@type":"AggregateRating",'
+        '"ratingValue":4.5,"reviewCount":12}}</script>'
+    )
+    text_rating = '<div class="rating">Puntaje <span>4.5</span> Calificación promedio entre <b>12</b> opiniones</div>'
+    # Estado VTEX con textos de opiniones de otros productos: no son la calificación de la página
+    state = ('<script>window.__STATE__ = {"Review:1": {"text": "Muy bueno, 5 opiniones coinciden"},'
+             '"Product:2": {"label": "4.2 Calificación promedio entre 30 opiniones"}};</script>'
+             '<style>.opiniones::after { content: "8 opiniones"; }</style>')
+    return {
+        "json_ld": f"<html><head>{script}{json_ld}</head><body>{filler}{text_rating}</body></html>",
+        "estado_vtex": f"<html><head>{script}{state}</head><body>{filler}</body></html>",
+        "estado_vtex_con_texto": f"<html><head>{state}</head><body>{filler}{text_rating}</body></html>",
+        "texto": f"<html><head>{script}</head><body>{filler}{text_rating}</body></html>",
+        "sin_calificacion": f"<html><head>{script}</head><body>{filler}</body></html>",
+    }
+
+
+def _load_pages(directory: str) -> dict:
+    return {p.name: p.read_text(encoding="utf-8", errors="replace") for p in sorted(Path(directory).glob("*.html"))}
+
+
+def _bench(fn, page: str, reps: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reps):
+        fn(page)
+    return (time.perf_counter() - start) / reps
+
+
+def main():
+    pages = _load_pages(sys.argv[1]) if len(sys.argv) > 1 else _synthetic_pages()
+    reps = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    if not pages:
+        print("No se encontraron archivos .html")
+        sys.exit(1)
+
+    print(f"{'página':<24}{'KB':>8}{'soup ms':>12}{'rápido ms':>12}{'speedup':>10}  resultado")
+    for name, page in pages.items():
+        slow = _bench(extract_rating_soup, page, reps)
+        fast = _bench(extract_rating, page, reps)
+        # Mismo resultado que la implementación de referencia
+        assert extract_rating(page) == extract_rating_soup(page), (name, extract_rating(page), extract_rating_soup(page))
+        print(f"{name[:23]:<24}{len(page) / 1024:>8.0f}{slow * 1000:>12.2f}{fast * 1000:>12.3f}"
+              f"{slow / fast:>9.0f}x  {extract_rating(page)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local que imita a exito.com para benchmarks sin red
+
+Sirve la API de búsqueda VTEX (_from/_to, header 'resources', fq=P[a TO b],
+límite de 2500 items) y las páginas de producto (/<linkText>/p), con
+latencia y errores inyectables. El catálogo se arma repitiendo respuestas
+grabadas (--fixtures) o, si no hay, productos sintéticos.
+
+Uso:
+    python benchmarks/vtex_stub_server.py [--port 8765] [--total 600] [--latency 0.05]
+        [--jitter 0.02] [--error-rate 0.02] [--fixtures DIR]
+    python benchmarks/vtex_stub_server.py --record DIR [--categoria televisores] [--productos 20]
+
+Con el servidor arriba: EXITO_BASE_HOST=http://127.0.0.1:8765 python -m exito_scraper.main scrape ...
+"""
+import argparse
+import copy
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SEARCH_PREFIX = "/api/catalog_system/pub/products/search/"
+MAX_ITEMS = 2500
+_PRICE_FQ_RE = re.compile(r"P\[(\d+) TO (\d+|\*)\]")
+
+
+def _synthetic_templates() -> List[dict]:
+    specs = {
+        "Tamaño de Pantalla": ["55 pulgadas"], "Resolución": ["4K UHD"], "Smart TV": ["Sí"],
+        "Sistema operativo": ["WebOS"], "Número De Puertos HDMI": ["3"], "Bluetooth": ["Sí"],
+    }
+    description = (
+        "<div><p>Disfruta de una imagen <strong>nítida</strong> y colores vivos.</p><ul>"
+        + "".join(f"<li>Característica {i}: valor de ejemplo</li>" for i in range(12))
+        + "</ul><p>*No se ofrece servicio de instalación.</p></div>"
+    )
+    brands = ["LG", "SAMSUNG", "KALLEY", "CHALLENGER", "HYUNDAI"]
+    return [{
+        "productName": f"Televisor {brand} 55 pulgadas UHD",
+        "brand": brand,
+        "metaTagDescription": description,
+        "allSpecifications": list(specs),
+        **specs,
+        "items": [{"images": [{"imageUrl": "https://exitocol.vtexassets.com/arquivos/ids/1/tv.jpg"}],
+                   "sellers": [{"commertialOffer": {"Price": 0}}]}],
+    } for brand in brands]
+
+
+def _synthetic_product_pages() -> List[str]:
+    filler = "".join(
+        f'<div class="vtex-flex-layout-0-x-flexRow"><span>Item {i}</span><a href="/p-{i}/p">Ver {i}</a></div>'
+        for i in range(800)
+    )
+    json_ld = ('<script type="application/ld+json">{"@context":"https://schema.org","@type":"Product",'
+               '"aggregateRating":{"@type":"AggregateRating","ratingValue":%s,"reviewCount":%d}}</script>')
+    pages = [f"<html><head>{json_ld % (r, n)}</head><body>{filler}</body></html>"
+             for r, n in (("4.5", 12), ("3.8", 4), ("5", 1))]
+    pages.append(f"<html><head></head><body>{filler}</body></html>")  # sin calificación
+    return pages
+
+
+def _load_fixtures(directory: str) -> Tuple[List[dict], List[str]]:
+    """*.json: respuestas de búsqueda VTEX (listas de productos); *.html: páginas de producto."""
+    templates, pages = [], []
+    for path in sorted(Path(directory).glob("*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        templates.extend(data if isinstance(data, list) else [data])
+    for path in sorted(Path(directory).glob("*.html")):
+        pages.append(path.read_text(encoding="utf-8", errors="replace"))
+    return templates, pages
+
+
+class StubCatalog:
+    """Catálogo determinista de `total` productos por categoría a partir de plantillas."""
+
+    def __init__(self, total: int, templates: List[dict], product_pages: List[str]):
+        self.total = total
+        self.templates = templates or _synthetic_templates()
+        self.product_pages = [p.encode("utf-8") for p in (product_pages or _synthetic_product_pages())]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def price(i: int) -> int:
+        return 100_000 + (i * 7919) % 5_000_000
+
+    @lru_cache(maxsize=None)
+    def indices(self, path: str, fq: Optional[str]) -> Tuple[int, ...]:
+        """Productos de la categoría (path) que cumplen el filtro de precio, si lo hay."""
+        m = _PRICE_FQ_RE.fullmatch(fq) if fq else None
+        if m is None:
+            return tuple(range(self.total))
+        lo = int(m.group(1))
+        hi = float("inf") if m.group(2) == "*" else int(m.group(2))
+        return tuple(i for i in range(self.total) if lo <= self.price(i) <= hi)
+
+    @lru_cache(maxsize=None)
+    def product(self, path: str, i: int) -> dict:
+        it = copy.deepcopy(self.templates[i % len(self.templates)])
+        slug = path.replace("/", "-")
+        it["productId"] = str(i)
+        it["productName"] = f"{it.get('productName', 'Producto')} #{i}"
+        it["linkText"] = f"{slug}-{i}"
+        for item in it.get("items") or []:
+            for seller in item.get("sellers") or []:
+                seller.setdefault("commertialOffer", {})["Price"] = self.price(i)
+        return it
+
+    def search(self, path: str, fq: Optional[str], _from: int, _to: int) -> Tuple[List[dict], int]:
+        with self._lock:
+            selected = self.indices(path, fq)
+            return [self.product(path, i) for i in selected[_from:_to + 1]], len(selected)
+
+    def product_page(self, link_text: str) -> bytes:
+        return self.product_pages[zlib.crc32(link_text.encode()) % len(self.product_pages)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StubServer"
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+        delay = max(0.0, server.latency + random.uniform(-server.jitter, server.jitter))
+        if delay:
+            time.sleep(delay)
+        if server.error_rate and random.random() < server.error_rate:
+            server.count_error()
+            return self._send(503, b"Service Unavailable", "text/plain")
+
+        url = urlparse(self.path)
+        if url.path.startswith(SEARCH_PREFIX):
+            return self._search(unquote(url.path[len(SEARCH_PREFIX):]), parse_qs(url.query))
+        if url.path.endswith("/p"):
+            return self._send(200, server.catalog.product_page(url.path.strip("/")), "text/html; charset=utf-8")
+        # Páginas de categoría (fallback HTML) no se imitan
+        return self._send(404, b"Not Found", "text/plain")
+
+    def _search(self, path: str, query: dict):
+        _from = int(query.get("_from", ["0"])[0])
+        _to = int(query.get("_to", [str(_from + 49)])[0])
+        if _from > MAX_ITEMS or _to - _from >= 50:
+            return self._send(400, b'{"error": "The maximum number of items is 2500"}', "application/json")
+        items, total = self.server.catalog.search(path, query.get("fq", [None])[0], _from, _to)
+        body = json.dumps(items, ensure_ascii=False).encode("utf-8")
+        self._send(206 if items else 200, body, "application/json; charset=utf-8",
+                   {"resources": f"{_from}-{_to}/{total}"})
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, catalog: StubCatalog, port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.catalog = catalog
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._stats_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count_request(self) -> None:
+        with self._stats_lock:
+            self.requests += 1
+
+    def count_error(self) -> None:
+        with self._stats_lock:
+            self.errors += 1
+
+    def start(self) -> "StubServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def make_server(total: int = 600, port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                error_rate: float = 0.0, fixtures: Optional[str] = None) -> StubServer:
+    templates, pages = _load_fixtures(fixtures) if fixtures else ([], [])
+    return StubServer(StubCatalog(total, templates, pages), port=port, latency=latency,
+                      jitter=jitter, error_rate=error_rate)
+
+
+def record(directory: str, categoria: str, productos: int) -> None:
+    """Graba una página de búsqueda real y algunas páginas de producto como fixtures."""
+    import requests
+    from exito_scraper.config import BASE_HOST, CATEGORY_API_PATHS, DEFAULT_HEADERS, TIMEOUT
+
+    out = Path(directory)
+    out.mkdir(parents=True, exist_ok=True)
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    url = f"{BASE_HOST}{SEARCH_PREFIX}{CATEGORY_API_PATHS[categoria]}?_from=0&_to=49"
+    response = session.get(url, timeout=TIMEOUT)
+    response.raise_for_status()
+    items = response.json()
+    (out / f"{categoria}.json").write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+    for it in items[:productos]:
+        page = session.get(f"{BASE_HOST}/{it['linkText']}/p", timeout=TIMEOUT)
+        if page.ok:
+            (out / f"{it['linkText']}.html").write_text(page.text, encoding="utf-8")
+    print(f"Grabados {len(items)} productos y {min(productos, len(items))} páginas en {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API VTEX de exito.com")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--total", type=int, default=600, help="Productos por categoría")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia media por request (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Variación uniforme de la latencia (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de requests que responden 503")
+    parser.add_argument("--fixtures", default=None, help="Directorio con respuestas grabadas (*.json, *.html)")
+    parser.add_argument("--record", default=None, help="Grabar fixtures desde exito.com en este directorio y salir")
+    parser.add_argument("--categoria", default="televisores", help="Categoría a grabar (con --record)")
+    parser.add_argument("--productos", type=int, default=20, help="Páginas de producto a grabar (con --record)")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.categoria, args.productos)
+        return
+    server = make_server(args.total, args.port, args.latency, args.jitter, args.error_rate, args.fixtures)
+    print(f"Servidor VTEX local en {server.url} (Ctrl+C para detener)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
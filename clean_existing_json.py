@@ -1,89 +1,115 @@
 #!/usr/bin/env python3
 """
 Script para limpiar y mejorar el formato de los detalles adicionales en archivos JSON existentes
+(también lee .gz / .zst; la salida conserva la compresión)
 """
 import json
+import os
 import sys
+from functools import partial
 from pathlib import Path
 from exito_scraper.utils.html_formatter import clean_html_details, format_details_as_markdown
+from exito_scraper.utils.compression import open_text, split_compression
+from exito_scraper.utils.json_codec import dumps, loads
+from exito_scraper.utils.json_stream import (
+    JsonArrayWriter, format_array_item, iter_json_array, iter_lines, map_batches,
+)
 
-def clean_existing_json(input_file: str, output_file: str | None = None):
+def clean_existing_json(input_file: str, output_file: str | None = None, workers: int | None = None):
     """
     Limpia los detalles adicionales de un archivo JSON existente
-    
+
+    Lee y escribe en streaming (memoria constante) y limpia los productos por
+    lotes en varios procesos, conservando el orden.
+
     Args:
         input_file: Archivo JSON/JSONL a limpiar
         output_file: Archivo de salida (opcional)
+        workers: Procesos para la limpieza (por defecto, uno por CPU)
     """
+    workers = workers or os.cpu_count() or 1
     input_path = Path(input_file)
     
     if not input_path.exists():
         print(f"Error: El archivo {input_file} no existe")
         return False
     
+    base, compression = split_compression(input_path)
+    is_jsonl = base.suffix == '.jsonl'
+
     # Generar nombre de archivo de salida si no se proporciona
     if output_file is None:
-        if input_path.suffix == '.jsonl':
-            output_file = str(input_path.with_name(input_path.stem + '_cleaned.jsonl'))
+        if is_jsonl:
+            output_file = str(base.with_name(base.stem + '_cleaned.jsonl' + compression))
         else:
-            output_file = str(input_path.with_name(input_path.stem + '_cleaned.json'))
+            output_file = str(base.with_name(base.stem + '_cleaned.json' + compression))
     
     try:
-        productos = []
-        
-        # Leer archivo (detectar si es JSONL o JSON)
-        if input_path.suffix == '.jsonl':
-            # Formato JSONL - una línea por producto
-            with open(input_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if line:
-                        try:
-                            producto = json.loads(line)
-                            productos.append(clean_product_details(producto))
-                        except json.JSONDecodeError as e:
-                            print(f"Error en línea {line_num}: {e}")
-                            continue
-        else:
-            # Formato JSON - array de productos
-            with open(input_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    for producto in data:
-                        productos.append(clean_product_details(producto))
-                else:
-                    productos.append(clean_product_details(data))
-        
-        # Escribir archivo limpio
         output_path = Path(output_file)
-        if output_path.suffix == '.jsonl':
-            # Escribir como JSONL
-            with open(output_path, 'w', encoding='utf-8') as f:
-                for producto in productos:
-                    f.write(json.dumps(producto, ensure_ascii=False) + '\n')
-        else:
-            # Escribir como JSON formateado
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(productos, f, indent=2, ensure_ascii=False)
-        
-        print(f"Limpiado: {len(productos)} productos")
+        as_jsonl = split_compression(output_path)[0].suffix == '.jsonl'
+        worker = partial(_clean_batch, as_jsonl=as_jsonl)
+        count = 0
+        example = None
+
+        with open_text(input_path, 'r') as src, open_text(output_path, 'w') as out:
+            # Leer archivo (detectar si es JSONL o JSON) sin cargarlo completo
+            if is_jsonl:
+                # Formato JSONL - una línea por producto (el parseo se hace en los workers)
+                items = iter_lines(src)
+            else:
+                # Formato JSON - arreglo de productos, leído elemento a elemento
+                items = enumerate(iter_json_array(src), 1)
+
+            writer = None if as_jsonl else JsonArrayWriter(out)
+            for line_num, text, error in map_batches(worker, items, workers=workers):
+                if error:
+                    print(f"Error en línea {line_num}: {error}")
+                    continue
+                if example is None:
+                    example = loads(text)
+                if writer is None:
+                    out.write(text + '\n')
+                else:
+                    writer.write_formatted(text)
+                count += 1
+            if writer is not None:
+                writer.close()
+
+        print(f"Limpiado: {count} productos")
         print(f"Archivo original: {input_file}")
         print(f"Archivo limpio: {output_file}")
-        
+
         # Mostrar ejemplo de mejora
-        if productos:
-            example = productos[0]
+        if example is not None:
             if 'detalles_adicionales' in example and example['detalles_adicionales']:
                 print(f"\nEjemplo de mejora en detalles:")
                 print("Antes (HTML):", example.get('detalles_adicionales_original', 'N/A')[:100] + '...')
                 print("Después (limpio):", example['detalles_adicionales'][:100] + '...')
-        
+
         return True
-        
+
     except Exception as e:
         print(f"Error durante la limpieza: {e}")
         return False
 
+def _clean_batch(batch: list, as_jsonl: bool) -> list:
+    """
+    Limpia y serializa un lote en un proceso worker. Cada elemento es
+    (línea, JSON crudo o producto ya parseado); retorna (línea, texto, error).
+    """
+    results = []
+    for line_num, item in batch:
+        if isinstance(item, str):
+            try:
+                item = loads(item)
+            except json.JSONDecodeError as e:
+                results.append((line_num, None, str(e)))
+                continue
+        producto = clean_product_details(item)
+        text = dumps(producto) if as_jsonl else format_array_item(producto)
+        results.append((line_num, text, None))
+    return results
+
 def clean_product_details(producto: dict) -> dict:
     """
     Limpia los detalles adicionales de un producto individual
@@ -113,13 +139,20 @@ def clean_product_details(producto: dict) -> dict:
     return producto
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso: python clean_existing_json.py <archivo_json> [archivo_salida]")
+    args = sys.argv[1:]
+    workers = None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+
+    if len(args) < 1:
+        print("Uso: python clean_existing_json.py <archivo_json> [archivo_salida] [--workers N]")
         print("Ejemplo: python clean_existing_json.py data/televisores_formatted.json")
-        print("Ejemplo: python clean_existing_json.py data/televisores.jsonl")
+        print("Ejemplo: python clean_existing_json.py data/televisores.jsonl --workers 4")
         sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    
-    clean_existing_json(input_file, output_file)
+
+    input_file = args[0]
+    output_file = args[1] if len(args) > 1 else None
+
+    clean_existing_json(input_file, output_file, workers)
@@ -2,37 +2,51 @@ from __future__ import annotations
 import csv
 from typing import Iterable
 from pathlib import Path
-from ..domain.producto import Producto
+from ..domain.producto import Producto, BASE_FIELDS
 from ..domain.ports import RepositoryPort
 
 class CsvRepositoryAdapter(RepositoryPort):
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, columns: tuple = BASE_FIELDS):
         # Usar ruta relativa desde el módulo exito_scraper/data
         base_dir = Path(__file__).parent.parent / "data"  # exito_scraper/data/
         base_dir.mkdir(exist_ok=True)  # Crear si no existe
         
         self.path = base_dir / filename
+        self.columns = tuple(columns)
         self._ensure_header()
 
     def _ensure_header(self):
-        if not self.path.exists():
+        if not self.path.exists() or self.path.stat().st_size == 0:
             with self.path.open("w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f)
-                writer.writerow([
-                    "contador_extraccion_total","contador_extraccion","titulo","marca",
-                    "precio_texto","precio_valor","moneda","tamaño","calificacion","numero_opiniones",
-                    "detalles_adicionales","fuente","categoria","imagen","link",
-                    "pagina","fecha_extraccion","extraction_status"
-                ])
+                writer.writerow(self.columns)
+            return
+        # Agregar filas con otras columnas bajo el encabezado existente corrompe el archivo
+        with self.path.open(newline="", encoding="utf-8") as f:
+            header = tuple(next(csv.reader(f), ()))
+        if header != self.columns:
+            raise ValueError(
+                f"{self.path} tiene {len(header)} columnas y esta corrida escribe {len(self.columns)} "
+                f"(tipo_cambio solo se escribe con --delta); use otro archivo de salida"
+            )
 
     def persist(self, productos: Iterable[Producto]) -> None:
+        # Se arma la página completa antes de abrir el archivo: si el iterador
+        # falla a mitad de página no queda ninguna fila suya
+        rows = [p.as_row(self.columns) for p in productos]
+        if not rows:
+            return
         with self.path.open("a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            for p in productos:
-                d = p.to_dict()
-                writer.writerow([
-                    d["contador_extraccion_total"], d["contador_extraccion"], d["titulo"], d["marca"],
-                    d["precio_texto"], d["precio_valor"], d["moneda"], d["tamaño"], d["calificacion"], d["numero_opiniones"],
-                    d["detalles_adicionales"], d["fuente"], d["categoria"], d["imagen"], d["link"],
-                    d["pagina"], d["fecha_extraccion"], d["extraction_status"]
-                ])
+            csv.writer(f).writerows(rows)
+
+    def commit_token(self) -> int:
+        # Tamaño del archivo tras la última página completa
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def rollback(self, token) -> None:
+        """Trunca el archivo a la última página completa (elimina filas a medio escribir)."""
+        if token is None or not self.path.exists():
+            return
+        if self.path.stat().st_size > int(token):
+            with self.path.open("r+b") as f:
+                f.truncate(int(token))
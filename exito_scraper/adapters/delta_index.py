@@ -0,0 +1,138 @@
+from __future__ import annotations
+import json, sqlite3, threading, time, hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+from ..utils.json_codec import dumps, loads
+
+class DeltaEntry(NamedTuple):
+    raw_hash: str
+    content_hash: str
+    rating: Tuple[str, str]
+
+class SqliteDeltaIndex:
+    """
+    Índice del último snapshot por (categoría, producto) para el modo delta.
+
+    Guarda el hash del payload crudo (para saltar la normalización si no
+    cambió), el hash del contenido relevante (precio, título, calificación,
+    detalles), la calificación y la última fila emitida (para reportar
+    productos que desaparecen).
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS products ("
+            " categoria TEXT NOT NULL,"
+            " product_key TEXT NOT NULL,"
+            " raw_hash TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " rating TEXT NOT NULL,"
+            " review_count TEXT NOT NULL,"
+            " last_row TEXT NOT NULL,"
+            " last_seen_at REAL NOT NULL,"
+            " PRIMARY KEY (categoria, product_key));"
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " categoria TEXT PRIMARY KEY,"
+            " started_at REAL NOT NULL);"
+        )
+        self._conn.commit()
+
+    # ---------- Hashes ----------
+    # Siempre con la librería estándar: el hash no debe cambiar según el codec instalado
+
+    @staticmethod
+    def raw_hash(item: Dict[str, Any]) -> str:
+        payload = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def content_hash(row: Dict[str, Any]) -> str:
+        fields = [row.get(k) for k in ("titulo", "marca", "precio_valor", "precio_texto",
+                                       "calificacion", "numero_opiniones", "detalles_adicionales")]
+        return hashlib.sha1(json.dumps(fields, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    # ---------- Corridas ----------
+
+    def begin_run(self, categoria: str, resume: bool = False) -> None:
+        """Marca el inicio de la corrida; al reanudar se conserva el inicio original."""
+        with self._lock:
+            if resume and self._conn.execute(
+                    "SELECT 1 FROM runs WHERE categoria = ?", (categoria,)).fetchone():
+                return
+            self._conn.execute(
+                "INSERT INTO runs (categoria, started_at) VALUES (?, ?) "
+                "ON CONFLICT(categoria) DO UPDATE SET started_at = excluded.started_at",
+                (categoria, time.time()),
+            )
+            self._conn.commit()
+
+    # ---------- Lecturas / escrituras ----------
+
+    def lookup(self, categoria: str, keys: Iterable[str]) -> Dict[str, DeltaEntry]:
+        keys = list(keys)
+        found: Dict[str, DeltaEntry] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT product_key, raw_hash, content_hash, rating, review_count FROM products "
+                    f"WHERE categoria = ? AND product_key IN ({marks})",
+                    (categoria, *chunk),
+                )
+                for key, raw_hash, content_hash, rating, review_count in rows:
+                    found[key] = DeltaEntry(raw_hash, content_hash, (rating, review_count))
+        return found
+
+    def touch(self, categoria: str, keys: Iterable[str]) -> None:
+        """Productos vistos sin cambios: solo se actualiza last_seen_at."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE products SET last_seen_at = ? WHERE categoria = ? AND product_key = ?",
+                [(now, categoria, k) for k in keys],
+            )
+            self._conn.commit()
+
+    def upsert(self, categoria: str, rows: Iterable[Tuple[str, str, str, Dict[str, Any]]]) -> None:
+        """rows: (key, raw_hash, content_hash, fila del producto)."""
+        now = time.time()
+        params = [
+            (categoria, key, raw_hash, content_hash, row.get("calificacion") or "",
+             row.get("numero_opiniones") or "", dumps(row), now)
+            for key, raw_hash, content_hash, row in rows
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO products (categoria, product_key, raw_hash, content_hash, rating, review_count,"
+                " last_row, last_seen_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(categoria, product_key) DO UPDATE SET raw_hash = excluded.raw_hash,"
+                " content_hash = excluded.content_hash, rating = excluded.rating,"
+                " review_count = excluded.review_count, last_row = excluded.last_row,"
+                " last_seen_at = excluded.last_seen_at",
+                params,
+            )
+            self._conn.commit()
+
+    def pop_removed(self, categoria: str) -> List[Dict[str, Any]]:
+        """Retorna y elimina los productos no vistos desde el inicio de la corrida."""
+        with self._lock:
+            started = self._conn.execute(
+                "SELECT started_at FROM runs WHERE categoria = ?", (categoria,)).fetchone()
+            if not started:
+                return []
+            rows = self._conn.execute(
+                "SELECT last_row FROM products WHERE categoria = ? AND last_seen_at < ?",
+                (categoria, started[0]),
+            ).fetchall()
+            self._conn.execute(
+                "DELETE FROM products WHERE categoria = ? AND last_seen_at < ?", (categoria, started[0]))
+            self._conn.commit()
+        return [loads(r[0]) for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,20 +1,68 @@
 from __future__ import annotations
-import re, json, time, random
-from typing import Iterable, List, Dict, Any, Optional
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+import re, threading, time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Deque
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse, quote
 import requests
-from bs4 import BeautifulSoup
 
-from ..domain.producto import Producto
+from ..domain.producto import Producto, FIELDS
 from ..domain.ports import ScraperPort
-from ..config import EXPECTED_URLS, CATEGORY_API_PATHS, BASE_HOST, DEFAULT_HEADERS, TIMEOUT, REQUEST_DELAY_SECONDS
+from ..config import (
+    EXPECTED_URLS, CATEGORY_API_PATHS, BASE_HOST, DEFAULT_HEADERS, HTTP_POOL_SIZE,
+    ITEMS_PER_PAGE, VTEX_MAX_ITEMS, MAX_CONCURRENT_PER_HOST,
+    RATING_ENRICH_LIMIT, RATING_WORKERS, CATEGORY_SHARD_PATHS,
+)
 from ..utils.html_formatter import clean_html_details
+from .http_cache import HttpCache
+from .rating_store import SqliteRatingStore
+from .rate_limiter import AdaptiveRateLimiter
+from .http_transport import HttpTransport
+from .delta_index import SqliteDeltaIndex
+from .shard_planner import Shard, VtexShardPlanner
+from ..utils.rating_extractor import extract_rating
+from ..utils.product_cards import parse_product_cards
+from ..utils.state_extractor import extract_state_json
+from ..utils.json_codec import loads
+from ..utils.metrics import METRICS
 
 class ExitoScraperAdapter(ScraperPort):
-    def __init__(self, session: Optional[requests.Session] = None):
+    def __init__(self, session: Optional[requests.Session] = None,
+                 rating_limit: Optional[int] = RATING_ENRICH_LIMIT,
+                 rating_workers: int = RATING_WORKERS,
+                 cache: Optional[HttpCache] = None,
+                 rating_store: Optional[SqliteRatingStore] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 pool_size: int = HTTP_POOL_SIZE,
+                 max_per_host: int = MAX_CONCURRENT_PER_HOST,
+                 delta_index: Optional[SqliteDeltaIndex] = None,
+                 shard: bool = False):
         self.session = session or requests.Session()
         self.session.headers.update(DEFAULT_HEADERS)
+        self.transport = HttpTransport(self.session, rate_limiter, pool_size=pool_size, max_per_host=max_per_host)
+        self.rate_limiter = self.transport.rate_limiter
+        self.cache = cache
+        self.rating_store = rating_store
+        self.delta_index = delta_index
+        # Categorías cuya última página llegó incompleta (fin del catálogo)
+        self._exhausted: set = set()
+        # Total de productos por categoría (header 'resources' de VTEX)
+        self._totals: Dict[str, int] = {}
+        # Items crudos por (categoría, página), antes del filtro delta (ver page_size)
+        self._page_sizes: Dict[tuple[str, int], int] = {}
+        # Modo sharding: shards planificados y productIds ya entregados por categoría
+        self.shard = shard
+        self._shards: Dict[str, List[Shard]] = {}
+        self._seen: Dict[str, set] = {}
+        self.rating_limit = rating_limit
+        self.rating_workers = max(1, int(rating_workers))
         self._global_counter = 0
+        self._counter_lock = threading.Lock()
+
+    def _next_counter(self) -> int:
+        with self._counter_lock:
+            self._global_counter += 1
+            return self._global_counter
 
     def _with_page(self, url: str, page: int) -> str:
         """Reemplaza (o añade) el query param ?page=N."""
@@ -24,12 +72,18 @@ class ExitoScraperAdapter(ScraperPort):
         parts[4] = urlencode(qs, doseq=True)
         return urlunparse(parts)
 
-    def _sleep(self):
-        lo, hi = REQUEST_DELAY_SECONDS
-        time.sleep(random.uniform(lo, hi))
+    def _http_get(self, url: str, kind: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET a través del transporte (reintentos, circuito, limitador) y la caché si existe."""
+        def do_get(extra: Dict[str, str]) -> requests.Response:
+            merged = dict(headers or {}, **extra) or None
+            return self.transport.get(url, kind, headers=merged)
+
+        if self.cache is None:
+            return do_get({})
+        return self.cache.fetch(url, kind, do_get)
 
     def _get(self, url: str) -> str:
-        r = self.session.get(url, timeout=TIMEOUT)
+        r = self._http_get(url, "page")
         r.raise_for_status()
         return r.text
 
@@ -49,47 +103,97 @@ class ExitoScraperAdapter(ScraperPort):
                 'Upgrade-Insecure-Requests': '1',
             }
             
-            response = self.session.get(product_url, headers=headers, timeout=TIMEOUT)
+            response = self._http_get(product_url, "product", headers=headers)
             if response.status_code != 200:
                 return "", ""
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Buscar patrones de calificación en el texto
-            page_text = soup.get_text()
-            
-            # Patrón para "X.X Calificación promedio entre Y opiniones"
-            rating_pattern = r'(\d+\.?\d*)\s*Calificación\s+promedio\s+entre\s+(\d+)\s+opiniones'
-            rating_match = re.search(rating_pattern, page_text, re.IGNORECASE)
-            
-            if rating_match:
-                rating = rating_match.group(1)
-                review_count = rating_match.group(2)
-                return rating, review_count
-            
-            # Patrón alternativo para "X.X de 5 estrellas (Y opiniones)"
-            alt_pattern = r'(\d+\.?\d*)\s*de\s+5\s+estrellas.*?(\d+)\s+opiniones'
-            alt_match = re.search(alt_pattern, page_text, re.IGNORECASE)
-            
-            if alt_match:
-                rating = alt_match.group(1)
-                review_count = alt_match.group(2)
-                return rating, review_count
-                
-            # Buscar solo número de opiniones si no hay rating
-            review_pattern = r'(\d+)\s+[Oo]piniones'
-            review_match = re.search(review_pattern, page_text)
-            
-            if review_match:
-                review_count = review_match.group(1)
-                return "No tiene Calificacion", review_count
-                
-            return "No tiene Calificacion", "0"
+            # Ruta rápida (JSON-LD / regex sobre el HTML crudo); BeautifulSoup
+            # solo se usa como último recurso dentro de extract_rating
+            return extract_rating(response.text)
             
+        except requests.RequestException:
+            # Errores de red (ya reintentados por el transporte): que decida el llamador
+            raise
         except Exception as e:
-            # En caso de error, retornar valores por defecto
+            # En caso de error de parseo, retornar valores por defecto
+            print(f"No se pudo leer la calificación de {product_url}: {e}")
             return "No tiene Calificacion", "0"
 
+    def _start_rating_fetches(self, pool: ThreadPoolExecutor, items: List[Dict[str, Any]]) -> Dict[int, tuple[str, Any]]:
+        """
+        Etapa de enriquecimiento: lanza en el pool la consulta de la página de
+        cada producto (formato VTEX) para obtener calificación y opiniones.
+        Respeta rating_limit (None = todos, 0 = ninguno, N = primeros N).
+        Retorna {idx: (clave, Future | (rating, review_count) desde rating_store)}.
+        """
+        eligible: List[tuple[int, str, str]] = []
+        for idx, it in enumerate(items, start=1):
+            link_text = (it.get("linkText") or "").strip() if 'productName' in it else ""
+            if link_text:
+                key = self._product_key(it)
+                eligible.append((idx, key, f"{BASE_HOST}/{link_text}/p"))
+        if self.rating_limit is not None:
+            eligible = eligible[:max(0, self.rating_limit)]
+        if not eligible:
+            return {}
+
+        cached = self.rating_store.get_fresh(key for _, key, _ in eligible) if self.rating_store else {}
+        if cached:
+            METRICS.inc("ratings_total", len(cached), source="cache")
+        ratings: Dict[int, tuple[str, Any]] = {}
+        for idx, key, link in eligible:
+            if key in cached:
+                ratings[idx] = (key, cached[key])
+            else:
+                ratings[idx] = (key, pool.submit(self._fetch_rating, link))
+        return ratings
+
+    def _fetch_rating(self, link: str) -> Optional[tuple[str, str]]:
+        """None si la página no pudo descargarse: el producto conserva los valores por defecto."""
+        try:
+            with METRICS.timer("stage_seconds", stage="rating"):
+                value = self._extract_rating_from_product_page(link)
+            METRICS.inc("ratings_total", source="fetched")
+            return value
+        except Exception as e:
+            METRICS.inc("ratings_total", source="failed")
+            print(f"Error obteniendo calificación de {link}: {e}")
+            return None
+
+    @staticmethod
+    def _rating_ready(rating: Any) -> bool:
+        return rating is None or not isinstance(rating[1], Future) or rating[1].done()
+
+    @staticmethod
+    def _resolve_rating(rating: Any, fetched: List[tuple[str, str, str]]) -> Optional[tuple[str, str]]:
+        """
+        (calificacion, opiniones) ya normalizados, o None si no se consultó o
+        falló (error de red o respuesta no-200, que llega como ("", "")).
+        """
+        if rating is None:
+            return None
+        key, value = rating
+        if isinstance(value, Future):
+            value = value.result()
+            if value is None or not value[0]:
+                return None
+            fetched.append((key, value[0], value[1]))
+        calificacion, review_count = value
+        if calificacion == "0":
+            calificacion = "No tiene Calificacion"
+        return calificacion, review_count
+
+    @staticmethod
+    def _set_rating(producto: Producto, value: Optional[tuple[str, str]]) -> Producto:
+        if value is not None:
+            producto.calificacion, producto.numero_opiniones = value
+        return producto
+
+    @staticmethod
+    def _product_key(it: Dict[str, Any]) -> str:
+        """Clave estable del producto: productId (VTEX), linkText o link (HTML)."""
+        return str(it.get("productId") or it.get("linkText") or it.get("link") or "")
+
     # ---------- Parsers helpers ----------
 
     def _extract_state_json(self, html: str) -> Optional[dict]:
@@ -97,27 +201,7 @@ class ExitoScraperAdapter(ScraperPort):
         Intenta extraer un gran objeto JSON embebido en el HTML (estado/SSR),
         común en catálogos modernos. Fallback a None si no existe.
         """
-        # Busca llaves típicas de estado embebido
-        # 1) __STATE__ = {...};  2) __APOLLO_STATE__ = {...};  3) __NEXT_DATA__ = {...}
-        patterns = [
-            r"__STATE__\s*=\s*(\{.*?\})\s*;\s*</script>",
-            r"__APOLLO_STATE__\s*=\s*(\{.*?\})\s*;\s*</script>",
-            r'"__NEXT_DATA__"\s*:\s*(\{.*?\})\s*,\s*"__APOLLO_STATE__"',
-            r'"__NEXT_DATA__"\s*:\s*(\{.*?\})\s*<\/script>',
-        ]
-        for pat in patterns:
-            m = re.search(pat, html, re.DOTALL)
-            if m:
-                try:
-                    return json.loads(m.group(1))
-                except json.JSONDecodeError:
-                    # Algunos sitios minifican con caracteres no estándar; intenta limpieza básica
-                    cleaned = m.group(1).replace("\n", "").replace("\t", "")
-                    try:
-                        return json.loads(cleaned)
-                    except Exception:
-                        continue
-        return None
+        return extract_state_json(html)
 
     def _guess_items_from_state(self, state: dict) -> List[Dict[str, Any]]:
         """
@@ -185,55 +269,9 @@ class ExitoScraperAdapter(ScraperPort):
 
     def _guess_items_from_html(self, html: str) -> List[Dict[str, Any]]:
         """
-        Fallback: parsea tarjetas de producto en el HTML.
+        Fallback: parsea tarjetas de producto en el HTML (lxml + XPath, un item por producto).
         """
-        soup = BeautifulSoup(html, "lxml")
-        items: List[Dict[str, Any]] = []
-        # Selector genérico para catálogos (ajustable)
-        for card in soup.select("a[href*='/p']"):
-            # Evita anchors vacíos
-            title_raw = card.get("title") or ""
-            title = (title_raw[0] if isinstance(title_raw, list) and title_raw else str(title_raw)).strip()
-            link = card.get("href") or ""
-            if not link or not title:
-                continue
-
-            # Sube al contenedor para buscar precio/imagen/brand si están cerca
-            container = card.parent
-            price_text = ""
-            img = card.select_one("img")
-            if img and (img.get("src") or img.get("data-src")):
-                image = img.get("src") or img.get("data-src")
-            else:
-                image = ""
-
-            # heurística para precio visible en el contenedor
-            price_el = None
-            for sel in [".price", ".selling-price", "[class*='price']", "[data-testid*='price']"]:
-                price_el = card.select_one(sel) or (container.select_one(sel) if container else None)
-                if price_el:
-                    break
-            if price_el:
-                price_text = price_el.get_text(strip=True)
-
-            # Ensure link is a string
-            link_str = link[0] if isinstance(link, list) and link else str(link)
-            
-            # Ensure image is a string
-            image_str = image[0] if isinstance(image, list) and image else str(image) if image else ""
-
-            items.append({
-                "name": title,
-                "brand": "",
-                "price": None,
-                "currency": None,
-                "image": (BASE_HOST + image_str) if image_str and image_str.startswith("/") else image_str,
-                "link": (BASE_HOST + link_str) if link_str.startswith("/") else link_str,
-                "rating": "",
-                "details": "",
-                "price_text": price_text,
-            })
-        return items
+        return parse_product_cards(html, BASE_HOST)
 
     def _first_int_or_none(self, s: str) -> Optional[int]:
         s = s or ""
@@ -253,193 +291,427 @@ class ExitoScraperAdapter(ScraperPort):
 
     # ---------- Public Port ----------
 
+    def begin(self, categoria: str, resume: bool = False) -> None:
+        self._exhausted.discard(categoria)
+        with self._counter_lock:
+            self._page_sizes = {k: v for k, v in self._page_sizes.items() if k[0] != categoria}
+        if self.delta_index is not None:
+            self.delta_index.begin_run(categoria, resume=resume)
+        if self.shard:
+            self._plan_shards(categoria)
+
+    def _plan_shards(self, categoria: str) -> None:
+        """
+        Divide la categoría en shards bajo VTEX_MAX_ITEMS. Las páginas de los
+        shards se numeran seguidas (1..N) para que el caso de uso, el
+        checkpoint y --paginas funcionen igual que sin sharding.
+        """
+        path = CATEGORY_API_PATHS.get(categoria)
+        if not path:
+            raise ValueError(f"No se encontró el path de categoría para: {categoria}")
+        planner = VtexShardPlanner(self._count_products)
+        try:
+            shards = planner.plan(path, CATEGORY_SHARD_PATHS.get(categoria))
+        except Exception as e:
+            print(f"Error planificando shards de {categoria}: {e}; se continúa sin sharding")
+            return
+        with self._counter_lock:
+            self._shards[categoria] = shards
+            self._seen[categoria] = set()
+            # Total sin filtros: si los shards no lo cubren no se reportan eliminados
+            self._totals[categoria] = planner.total
+        if not shards and self._shards_cover(categoria):
+            self._exhausted.add(categoria)
+        total = sum(s.total for s in shards)
+        print(f"Sharding {categoria}: {len(shards)} shards, {total} productos, "
+              f"{sum(s.pages for s in shards)} páginas")
+
+    def _shards_cover(self, categoria: str) -> bool:
+        """Si la suma de los shards alcanza el total de la categoría sin filtros."""
+        with self._counter_lock:
+            return sum(s.total for s in self._shards[categoria]) >= self._totals.get(categoria, 0)
+
+    def _count_products(self, path: str, fq: Optional[str]) -> int:
+        """Total de productos para path/fq pidiendo un solo item (header 'resources')."""
+        response = self._http_get(self._search_url(path, fq, 0, 0), "search")
+        response.raise_for_status()
+        total = self._parse_total(response)
+        return total if total is not None else len(loads(response.content))
+
+    @staticmethod
+    def _search_url(path: str, fq: Optional[str], _from: int, _to: int) -> str:
+        query = f"fq={quote(fq, safe='')}&" if fq else ""
+        return f"{BASE_HOST}/api/catalog_system/pub/products/search/{path}?{query}_from={_from}&_to={_to}"
+
+    def _locate(self, categoria: str, page: int) -> Optional[tuple[Shard, int]]:
+        """(shard, página dentro del shard) para una página global, o None si no existe."""
+        for shard in self._shards[categoria]:
+            if page <= shard.pages:
+                return shard, page
+            page -= shard.pages
+        return None
+
+    def _dedup(self, categoria: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Descarta productos ya entregados por otro shard (rangos de precio solapados)."""
+        unique = []
+        with self._counter_lock:
+            seen = self._seen[categoria]
+            for it in items:
+                key = self._product_key(it)
+                if key and key in seen:
+                    continue
+                seen.add(key)
+                unique.append(it)
+        return unique
+
+    def page_count(self, categoria: str) -> Optional[int]:
+        """
+        Páginas del catálogo según el header 'resources' de VTEX (p. ej.
+        "0-49/1234"), limitado por VTEX_MAX_ITEMS. None si aún no se conoce.
+        Con sharding es la suma de las páginas de todos los shards.
+        """
+        with self._counter_lock:
+            shards = self._shards.get(categoria)
+            total = self._totals.get(categoria)
+        if shards is not None:
+            return sum(s.pages for s in shards)
+        if total is None:
+            return None
+        return -(-min(total, VTEX_MAX_ITEMS) // ITEMS_PER_PAGE)
+
+    def page_size(self, categoria: str, page: int) -> Optional[int]:
+        """Items que trajo la página (API o HTML), aunque el delta no entregue ninguno."""
+        with self._counter_lock:
+            return self._page_sizes.pop((categoria, page), None)
+
+    @staticmethod
+    def _parse_total(response: requests.Response) -> Optional[int]:
+        m = re.match(r"\s*\d+-\d+/(\d+)", response.headers.get("resources") or "")
+        return int(m.group(1)) if m else None
+
+    def _record_total(self, categoria: str, response: requests.Response) -> None:
+        total = self._parse_total(response)
+        if total is None:
+            return
+        with self._counter_lock:
+            first_time = categoria not in self._totals
+            self._totals[categoria] = total
+        if first_time and total > VTEX_MAX_ITEMS:
+            print(f"Aviso: {categoria} tiene {total} productos; la API solo pagina hasta {VTEX_MAX_ITEMS} "
+                  f"(use --shard para recorrerlos todos)")
+
+    def finish(self, categoria: str) -> Iterable[Producto]:
+        """En modo delta, retorna los productos que desaparecieron del catálogo."""
+        if self.delta_index is None:
+            return []
+        if categoria not in self._exhausted:
+            with self._counter_lock:
+                total = self._totals.get(categoria)
+            if categoria in self._shards:
+                hint = "" if self._shards_cover(categoria) else " (los shards no cubren todos los productos)"
+            elif total is not None and total > VTEX_MAX_ITEMS:
+                hint = f" (la API solo pagina {VTEX_MAX_ITEMS} de {total} productos; use --shard)"
+            else:
+                hint = ""
+            print(f"Delta: no se recorrió todo el catálogo de {categoria}; no se reportan eliminados{hint}")
+            return []
+        removed = []
+        for row in self.delta_index.pop_removed(categoria):
+            data = {k: v for k, v in row.items() if k in FIELDS}
+            data.update(tipo_cambio="ELIMINADO", fecha_extraccion=Producto.now_iso())
+            removed.append(Producto(**data))
+        return removed
+
     def scrape(self, categoria: str, page: int) -> Iterable[Producto]:
         if categoria not in EXPECTED_URLS:
             raise ValueError(f"Categoría no soportada: {categoria}")
 
-        # Use VTEX API with proper category path to ensure we get products only from the specific category
-        items_per_page = 50
-        _from = (page - 1) * items_per_page
-        _to = _from + items_per_page - 1
-        
         # Get the category path for the API
         category_path = CATEGORY_API_PATHS.get(categoria)
         if not category_path:
             raise ValueError(f"No se encontró el path de categoría para: {categoria}")
-        
+
+        sharded = categoria in self._shards
+        fq = None
+        local_page = page
+        if sharded:
+            located = self._locate(categoria, page)
+            if located is None:
+                return iter(())
+            shard, local_page = located
+            category_path, fq = shard.path, shard.fq
+
+        started = time.perf_counter()
+        # Use VTEX API with proper category path to ensure we get products only from the specific category
+        _from = (local_page - 1) * ITEMS_PER_PAGE
+        _to = _from + ITEMS_PER_PAGE - 1
+
         # Build the VTEX API URL using the category path (this ensures we get products from the exact category)
-        api_url = f"https://www.exito.com/api/catalog_system/pub/products/search/{category_path}?_from={_from}&_to={_to}"
-        
+        api_url = self._search_url(category_path, fq, _from, _to)
+
+        response = None
         try:
-            response = self.session.get(api_url, timeout=TIMEOUT)
+            response = self._http_get(api_url, "search")
             response.raise_for_status()
-            
-            # Parse JSON response
-            import json
-            items = json.loads(response.text)
-            
-        except Exception as e:
-            print(f"Error accessing VTEX API: {e}")
-            # Fallback to original HTML scraping method
-            url = self._with_page(EXPECTED_URLS[categoria], page)
-            html = self._get(url)
 
-            # 1) Intenta estado embebido
-            state = self._extract_state_json(html)
-            items = self._guess_items_from_state(state) if state else []
-            # 2) Fallback: tarjetas HTML
-            if not items:
-                items = self._guess_items_from_html(html)
+            # Parse JSON response (directamente desde los bytes, sin decodificar a str)
+            items = loads(response.content)
+            if sharded:
+                # Un shard incompleto no es el fin: el total sale de la planificación
+                items = self._dedup(categoria, items)
+                if page >= self.page_count(categoria) and self._shards_cover(categoria):
+                    self._exhausted.add(categoria)
+            else:
+                self._record_total(categoria, response)
+                with self._counter_lock:
+                    total = self._totals.get(categoria)
+                last_page = self.page_count(categoria)
+                # Página incompleta, o última según un total que la API alcanza a paginar:
+                # se llegó al final del catálogo. Con más de VTEX_MAX_ITEMS productos la
+                # última página paginable no lo es (y no se reportan eliminados)
+                if len(items) < ITEMS_PER_PAGE or (
+                        total is not None and total <= VTEX_MAX_ITEMS and page >= last_page):
+                    self._exhausted.add(categoria)
+            METRICS.observe("stage_seconds", time.perf_counter() - started, stage="search")
+            METRICS.inc("items_total", len(items), source="vtex")
 
-        productos: List[Producto] = []
+        except Exception as e:
+            print(f"Error accessing VTEX API: {e}")
+            METRICS.inc("vtex_fallback_total", categoria=categoria)
+            with METRICS.timer("stage_seconds", stage="fallback_html"):
+                # Fallback to original HTML scraping method
+                url = self._with_page(EXPECTED_URLS[categoria], page)
+                html = self._get(url)
+
+                # 1) Intenta estado embebido
+                state = self._extract_state_json(html)
+                items = self._guess_items_from_state(state) if state else []
+                # 2) Fallback: tarjetas HTML
+                if not items:
+                    items = self._guess_items_from_html(html)
+            METRICS.inc("items_total", len(items), source="html")
+
+        with self._counter_lock:
+            self._page_sizes[(categoria, page)] = len(items)
+        return self._iter_productos(categoria, page, items, started)
+
+    def _iter_productos(self, categoria: str, page: int, items: List[Dict[str, Any]],
+                        started: Optional[float] = None) -> Iterator[Producto]:
+        """
+        Normaliza y entrega los productos uno a uno. Las calificaciones se
+        descargan en un pool en segundo plano mientras avanza la normalización;
+        cada producto se entrega, en orden, cuando su calificación está lista.
+        La etapa "page" mide desde started hasta entregar el último producto.
 
-        for idx, it in enumerate(items, start=1):
-            self._global_counter += 1
-            
-            # Handle both VTEX API format and old format
-            if 'productName' in it:  # VTEX API format
-                titulo = (it.get("productName") or "").strip()
-                marca = (it.get("brand") or "").strip()
-                link_text = (it.get("linkText") or "").strip()
-                link = f"{BASE_HOST}/{link_text}/p" if link_text else ""
-                
-                # Get pricing from VTEX structure
-                precio_valor = None
-                moneda = "COP"
-                precio_texto = ""
-                img = ""
-                
-                if 'items' in it and it['items']:
-                    item = it['items'][0]
-                    # Get image
-                    if 'images' in item and item['images']:
-                        img = item['images'][0].get('imageUrl', '')
-                    
-                    # Get price
-                    if 'sellers' in item and item['sellers']:
-                        seller = item['sellers'][0]
-                        offer = seller.get('commertialOffer', {})
-                        precio_valor = offer.get('Price')
-                        if precio_valor:
-                            precio_valor = int(round(float(precio_valor)))
-                            precio_texto = f"COP {precio_valor}"
-                
-                # Extract detailed specifications from VTEX data
-                rating = "No tiene Calificacion"
-                review_count = "0"
-                
-                # Extract rating from individual product page (only for first few products to save time)
-                if link and idx <= 10:  # Only check ratings for first 10 products per page
-                    try:
-                        rating, review_count = self._extract_rating_from_product_page(link)
-                    except:
-                        rating = "No tiene Calificacion"
-                        review_count = "0"
-                
-                # Build detailed specifications from allSpecifications
-                details_parts = []
-                
-                # Add metaTagDescription if available
-                meta_desc = it.get('metaTagDescription', '').strip()
-                if meta_desc:
-                    details_parts.append(f"Descripción: {meta_desc}")
-                
-                # Extract key specifications
-                specs_dict = {}
-                for spec_name in it.get('allSpecifications', []):
-                    if spec_name in it:
-                        value = it[spec_name]
-                        if isinstance(value, list) and value:
-                            specs_dict[spec_name] = value[0]
-                        elif value:
-                            specs_dict[spec_name] = value
-                
-                # Format important specifications
-                important_specs = []
-                spec_priority = [
-                    'Tamaño de Pantalla', 'Resolución de la pantalla', 'Resolución', 'Sistema operativo',
-                    'Tipo de pantalla', 'Tipo De pantalla', 'Smart TV', 'Conexión Wi-fi', 'Bluetooth',
-                    'Número De Puertos HDMI', 'Número De Puertos USB', 'Potencia de Audio', 'Procesador',
-                    'Garantía', 'Peso', 'Ancho', 'Alto', 'Profundidad', 'Modelo', 'Referencia'
-                ]
-                
-                # Add prioritized specs
-                for spec_name in spec_priority:
-                    if spec_name in specs_dict and specs_dict[spec_name]:
-                        value = str(specs_dict[spec_name]).strip()
-                        if value and value.lower() not in ['no', 'false', '0']:
-                            important_specs.append(f"{spec_name}: {value}")
-                            
-                # Add remaining specs (limit total)
-                added_specs = set(spec_priority)
-                for spec_name, value in specs_dict.items():
-                    if len(important_specs) >= 15:  # Limit to 15 specs
-                        break
-                    if spec_name not in added_specs and value:
-                        value_str = str(value).strip()
-                        if value_str and value_str.lower() not in ['no', 'false', '0']:
-                            important_specs.append(f"{spec_name}: {value_str}")
-                            added_specs.add(spec_name)
-                
-                if important_specs:
-                    details_parts.append("Especificaciones: " + ". ".join(important_specs))
-                
-                details = ". ".join(details_parts)
-                
-            else:  # Old format from HTML scraping
-                titulo = (it.get("name") or "").strip()
-                marca = (it.get("brand") or "").strip()
-                img = (it.get("image") or "").strip()
-                link = (it.get("link") or "").strip()
-                rating = str(it.get("rating") or "").strip()
-                if not rating or rating == "" or rating == "0":
-                    rating = "No tiene Calificacion"
-                review_count = "0"  # Not available in old format
-                details = (it.get("details") or "").strip()
-
-                # precio
-                precio_valor = it.get("price")
-                moneda = it.get("currency")
-                precio_texto = it.get("price_text") or ""
-                if precio_valor and not precio_texto:
-                    precio_texto = f"{moneda or 'COP'} {int(round(float(precio_valor)))}"
-                if not precio_valor and precio_texto:
-                    precio_valor = self._first_int_or_none(precio_texto)
-
-            # tamaño: heurística por título
-            tam = self._infer_size(titulo) if "televisor" in categoria or "televisores" in categoria else ""
-
-            # Limpiar detalles adicionales de HTML
-            details_cleaned = clean_html_details(details) if details else ""
-
-            # Convertir calificación "0" a "No tiene Calificacion"
-            if rating == "0":
+        En modo delta solo se entregan productos nuevos o modificados, y los
+        items cuyo payload crudo no cambió ni siquiera se normalizan.
+        """
+        delta = self.delta_index
+        keys = [self._product_key(it) for it in items]
+        previous = delta.lookup(categoria, keys) if delta is not None else {}
+        fetched: List[tuple[str, str, str]] = []
+        touched: List[str] = []
+        upserts: List[tuple[str, str, str, Dict[str, Any]]] = []
+
+        def emit(idx: int, raw_hash: Optional[str], producto: Optional[Producto], rating: Any) -> Optional[Producto]:
+            value = self._resolve_rating(rating, fetched)
+            if delta is None:
+                return self._set_rating(producto, value)
+            key = keys[idx - 1]
+            prev = previous.get(key)
+            if value is None and prev is not None:
+                # Sin calificación nueva (fuera de --ratings, error o no-200): se conserva
+                # la guardada para no reportar un cambio de calificación falso
+                value = prev.rating
+            if producto is None:
+                # Payload sin cambios: solo la calificación puede haber cambiado
+                if value is None or value == prev.rating:
+                    touched.append(key)
+                    return None
+                producto = self._build_producto(items[idx - 1], idx, categoria, page)
+            self._set_rating(producto, value)
+            row = producto.as_dict()
+            content_hash = delta.content_hash(row)
+            if prev is not None and prev.content_hash == content_hash:
+                upserts.append((key, raw_hash, content_hash, row))
+                return None
+            producto.tipo_cambio = "NUEVO" if prev is None else "MODIFICADO"
+            row["tipo_cambio"] = producto.tipo_cambio
+            upserts.append((key, raw_hash, content_hash, row))
+            return producto
+
+        with ThreadPoolExecutor(max_workers=self.rating_workers) as pool:
+            ratings = self._start_rating_fetches(pool, items)
+            pending: Deque[tuple[int, Optional[str], Optional[Producto], Any]] = deque()
+
+            for idx, it in enumerate(items, start=1):
+                raw_hash = delta.raw_hash(it) if delta is not None else None
+                prev = previous.get(keys[idx - 1])
+                if prev is not None and prev.raw_hash == raw_hash:
+                    producto = None
+                else:
+                    producto = self._build_producto(it, idx, categoria, page)
+                pending.append((idx, raw_hash, producto, ratings.get(idx)))
+                while pending and self._rating_ready(pending[0][3]):
+                    out = emit(*pending.popleft())
+                    if out is not None:
+                        yield out
+            while pending:
+                out = emit(*pending.popleft())
+                if out is not None:
+                    yield out
+
+        if self.rating_store is not None and fetched:
+            self.rating_store.put_many(fetched)
+        if delta is not None:
+            delta.touch(categoria, touched)
+            delta.upsert(categoria, upserts)
+        if started is not None:
+            METRICS.observe("stage_seconds", time.perf_counter() - started, stage="page")
+
+    def _build_producto(self, it: Dict[str, Any], idx: int, categoria: str, page: int) -> Producto:
+        """Normaliza un item (formato VTEX o HTML) a Producto."""
+        started = time.perf_counter()
+        # Handle both VTEX API format and old format
+        if 'productName' in it:  # VTEX API format
+            titulo = (it.get("productName") or "").strip()
+            marca = (it.get("brand") or "").strip()
+            link_text = (it.get("linkText") or "").strip()
+            link = f"{BASE_HOST}/{link_text}/p" if link_text else ""
+
+            # Get pricing from VTEX structure
+            precio_valor = None
+            moneda = "COP"
+            precio_texto = ""
+            img = ""
+
+            if 'items' in it and it['items']:
+                item = it['items'][0]
+                # Get image
+                if 'images' in item and item['images']:
+                    img = item['images'][0].get('imageUrl', '')
+
+                # Get price
+                if 'sellers' in item and item['sellers']:
+                    seller = item['sellers'][0]
+                    offer = seller.get('commertialOffer', {})
+                    precio_valor = offer.get('Price')
+                    if precio_valor:
+                        precio_valor = int(round(float(precio_valor)))
+                        precio_texto = f"COP {precio_valor}"
+
+            # La calificación se completa luego en la etapa de enriquecimiento
+            rating = "No tiene Calificacion"
+            review_count = "0"
+
+            # Build detailed specifications from allSpecifications
+            details_parts = []
+
+            # Add metaTagDescription if available
+            meta_desc = it.get('metaTagDescription', '').strip()
+            if meta_desc:
+                details_parts.append(f"Descripción: {meta_desc}")
+
+            # Extract key specifications
+            specs_dict = {}
+            for spec_name in it.get('allSpecifications', []):
+                if spec_name in it:
+                    value = it[spec_name]
+                    if isinstance(value, list) and value:
+                        specs_dict[spec_name] = value[0]
+                    elif value:
+                        specs_dict[spec_name] = value
+
+            # Format important specifications
+            important_specs = []
+            spec_priority = [
+                'Tamaño de Pantalla', 'Resolución de la pantalla', 'Resolución', 'Sistema operativo',
+                'Tipo de pantalla', 'Tipo De pantalla', 'Smart TV', 'Conexión Wi-fi', 'Bluetooth',
+                'Número De Puertos HDMI', 'Número De Puertos USB', 'Potencia de Audio', 'Procesador',
+                'Garantía', 'Peso', 'Ancho', 'Alto', 'Profundidad', 'Modelo', 'Referencia'
+            ]
+
+            # Add prioritized specs
+            for spec_name in spec_priority:
+                if spec_name in specs_dict and specs_dict[spec_name]:
+                    value = str(specs_dict[spec_name]).strip()
+                    if value and value.lower() not in ['no', 'false', '0']:
+                        important_specs.append(f"{spec_name}: {value}")
+
+            # Add remaining specs (limit total)
+            added_specs = set(spec_priority)
+            for spec_name, value in specs_dict.items():
+                if len(important_specs) >= 15:  # Limit to 15 specs
+                    break
+                if spec_name not in added_specs and value:
+                    value_str = str(value).strip()
+                    if value_str and value_str.lower() not in ['no', 'false', '0']:
+                        important_specs.append(f"{spec_name}: {value_str}")
+                        added_specs.add(spec_name)
+
+            if important_specs:
+                details_parts.append("Especificaciones: " + ". ".join(important_specs))
+
+            details = ". ".join(details_parts)
+
+        else:  # Old format from HTML scraping
+            titulo = (it.get("name") or "").strip()
+            marca = (it.get("brand") or "").strip()
+            img = (it.get("image") or "").strip()
+            link = (it.get("link") or "").strip()
+            rating = str(it.get("rating") or "").strip()
+            if not rating or rating == "" or rating == "0":
                 rating = "No tiene Calificacion"
+            review_count = "0"  # Not available in old format
+            details = (it.get("details") or "").strip()
+
+            # precio
+            precio_valor = it.get("price")
+            moneda = it.get("currency")
+            precio_texto = it.get("price_text") or ""
+            if precio_valor and not precio_texto:
+                precio_texto = f"{moneda or 'COP'} {int(round(float(precio_valor)))}"
+            if not precio_valor and precio_texto:
+                precio_valor = self._first_int_or_none(precio_texto)
+
+        # tamaño: heurística por título
+        tam = self._infer_size(titulo) if "televisor" in categoria or "televisores" in categoria else ""
+
+        # Limpiar detalles adicionales de HTML
+        if details:
+            with METRICS.timer("stage_seconds", stage="clean_html"):
+                details_cleaned = clean_html_details(details)
+        else:
+            details_cleaned = ""
+
+        # Convertir calificación "0" a "No tiene Calificacion"
+        if rating == "0":
+            rating = "No tiene Calificacion"
+
+        status = "OK"
+        if not titulo:
+            status = "MISSING_FIELDS"
+
+        producto = Producto(
+            contador_extraccion_total=self._next_counter(),
+            contador_extraccion=idx,
+            titulo=titulo,
+            marca=marca,
+            precio_texto=precio_texto,
+            precio_valor=precio_valor if isinstance(precio_valor, int) else (int(precio_valor) if isinstance(precio_valor, float) else None),
+            moneda=moneda or ("COP" if precio_valor else None),
+            tamaño=tam,
+            calificacion=rating,
+            numero_opiniones=review_count,
+            detalles_adicionales=details_cleaned,
+            fuente="exito.com",
+            categoria=categoria,
+            imagen=img,
+            link=link if link.startswith("http") else (BASE_HOST + link if link else ""),
+            pagina=page,
+            fecha_extraccion=Producto.now_iso(),
+            extraction_status=status
+        )
+        METRICS.observe("stage_seconds", time.perf_counter() - started, stage="build")
+        return producto
 
-            status = "OK"
-            if not titulo:
-                status = "MISSING_FIELDS"
-
-            productos.append(Producto(
-                contador_extraccion_total=self._global_counter,
-                contador_extraccion=idx,
-                titulo=titulo,
-                marca=marca,
-                precio_texto=precio_texto,
-                precio_valor=precio_valor if isinstance(precio_valor, int) else (int(precio_valor) if isinstance(precio_valor, float) else None),
-                moneda=moneda or ("COP" if precio_valor else None),
-                tamaño=tam,
-                calificacion=rating,
-                numero_opiniones=review_count,
-                detalles_adicionales=details_cleaned,
-                fuente="exito.com",
-                categoria=categoria,
-                imagen=img,
-                link=link if link.startswith("http") else (BASE_HOST + link if link else ""),
-                pagina=page,
-                fecha_extraccion=Producto.now_iso(),
-                extraction_status=status
-            ))
-
-        self._sleep()
-        return productos
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import os, json, time, hashlib, threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from ..config import HTTP_CACHE_TTL_SECONDS, HTTP_CACHE_MAX_BYTES
+from ..utils.metrics import METRICS
+
+# Códigos de respuesta que se guardan (VTEX responde 206 en búsquedas paginadas)
+_CACHEABLE_STATUS = (200, 206)
+
+class HttpCache:
+    """
+    Caché HTTP en disco, indexado por URL.
+
+    - TTL por tipo de recurso ("search", "product", "page").
+    - Revalidación con ETag / Last-Modified cuando la entrada expira.
+    - Desalojo LRU (según mtime del cuerpo) para no superar max_bytes.
+
+    Cada entrada son dos archivos: <sha256>.body y <sha256>.meta.json.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = HTTP_CACHE_MAX_BYTES,
+                 ttls: Optional[Dict[str, int]] = None):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = dict(HTTP_CACHE_TTL_SECONDS, **(ttls or {}))
+        self._lock = threading.Lock()
+        self._total_bytes = sum(p.stat().st_size for p in self.dir.glob("*.body"))
+
+    # ---------- API ----------
+
+    def fetch(self, url: str, kind: str,
+              do_get: Callable[[Dict[str, str]], requests.Response]) -> requests.Response:
+        """
+        Retorna la respuesta para url, desde disco si está vigente.
+        do_get recibe headers condicionales adicionales y hace el GET real.
+        """
+        key = self._key(url)
+        meta = self._load_meta(key)
+        if meta is not None and time.time() - meta["stored_at"] < self.ttls.get(kind, 0):
+            cached = self._build_response(key, meta)
+            if cached is not None:
+                METRICS.inc("http_cache_total", kind=kind, result="hit")
+                return cached
+
+        conditional: Dict[str, str] = {}
+        if meta is not None:
+            if meta.get("etag"):
+                conditional["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                conditional["If-Modified-Since"] = meta["last_modified"]
+
+        response = do_get(conditional)
+
+        if response.status_code == 304 and meta is not None:
+            cached = self._build_response(key, meta)
+            if cached is not None:
+                meta["stored_at"] = time.time()
+                self._write_meta(key, meta)
+                METRICS.inc("http_cache_total", kind=kind, result="revalidated")
+                return cached
+            # El cuerpo desapareció (desalojado): repetir sin condicionales
+            response = do_get({})
+
+        METRICS.inc("http_cache_total", kind=kind, result="miss")
+        if response.status_code in _CACHEABLE_STATUS:
+            self._store(key, url, kind, response)
+        return response
+
+    # ---------- Internals ----------
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.dir / f"{key}.body"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.dir / f"{key}.meta.json"
+
+    def _load_meta(self, key: str) -> Optional[dict]:
+        try:
+            with self._meta_path(key).open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, key: str, meta: dict) -> None:
+        tmp = self._meta_path(key).with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(key))
+
+    def _build_response(self, key: str, meta: dict) -> Optional[requests.Response]:
+        body_path = self._body_path(key)
+        try:
+            body = body_path.read_bytes()
+            os.utime(body_path)  # marca de uso para LRU
+        except OSError:
+            return None
+        r = requests.Response()
+        r.status_code = meta["status"]
+        r._content = body
+        r.headers = CaseInsensitiveDict(meta.get("headers") or {})
+        r.encoding = meta.get("encoding")
+        r.url = meta["url"]
+        r.from_cache = True
+        return r
+
+    def _store(self, key: str, url: str, kind: str, response: requests.Response) -> None:
+        body = response.content
+        headers = dict(response.headers)
+        meta = {
+            "url": url,
+            "kind": kind,
+            "status": response.status_code,
+            "headers": headers,
+            "encoding": response.encoding,
+            "etag": headers.get("ETag") or headers.get("etag"),
+            "last_modified": headers.get("Last-Modified") or headers.get("last-modified"),
+            "stored_at": time.time(),
+        }
+        body_path = self._body_path(key)
+        with self._lock:
+            old_size = body_path.stat().st_size if body_path.exists() else 0
+            tmp = body_path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, body_path)
+            self._write_meta(key, meta)
+            self._total_bytes += len(body) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Elimina las entradas menos usadas hasta quedar bajo max_bytes."""
+        entries = []
+        for p in self.dir.glob("*.body"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            key = p.name[:-len(".body")]
+            for path in (p, self._meta_path(key)):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total -= size
+        self._total_bytes = total
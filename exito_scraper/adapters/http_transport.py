@@ -0,0 +1,167 @@
+from __future__ import annotations
+import time, random, threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import (
+    TIMEOUT, MAX_CONCURRENT_PER_HOST, HTTP_POOL_SIZE, HTTP_RETRIES, HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX, HTTP_RETRY_STATUS, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS,
+)
+from ..utils.metrics import METRICS
+from .rate_limiter import AdaptiveRateLimiter
+
+class CircuitOpenError(requests.RequestException):
+    """El circuito del endpoint está abierto: no se intenta el request."""
+
+class CircuitBreaker:
+    """
+    Circuito por endpoint: se abre tras failure_threshold fallos seguidos,
+    rechaza requests durante reset_seconds y luego deja pasar una prueba
+    (half-open) que decide si se cierra o vuelve a abrirse.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release(self) -> None:
+        """Libera la prueba half-open si terminó sin success() ni failure()."""
+        with self._lock:
+            self._probing = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+class HttpTransport:
+    """
+    Capa HTTP del scraper: pool de conexiones dimensionado, cupo de
+    concurrencia por host, limitador adaptativo, reintentos con backoff
+    exponencial con jitter (solo GET, idempotente) y un circuito por endpoint.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 pool_size: int = HTTP_POOL_SIZE, retries: int = HTTP_RETRIES,
+                 max_per_host: int = MAX_CONCURRENT_PER_HOST):
+        self.session = session or requests.Session()
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.retries = max(0, retries)
+        self.max_per_host = max(1, max_per_host)
+        self.retry_count = 0
+        adapter = HTTPAdapter(pool_connections=max(1, pool_size), pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker()
+            return self._breakers[endpoint]
+
+    @contextmanager
+    def _host_slot(self, url: str):
+        """Reserva un cupo de concurrencia para el host de la URL."""
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[host] = slot
+        with slot:
+            yield
+
+    def get(self, url: str, endpoint: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        GET con reintentos. Retorna la última respuesta (aunque sea un status
+        reintentable agotado) o relanza el último error de red.
+        """
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                METRICS.inc("http_circuit_open_total", endpoint=endpoint)
+                raise CircuitOpenError(f"Circuito abierto para '{endpoint}': {url}")
+            try:
+                error: Optional[requests.RequestException] = None
+                response: Optional[requests.Response] = None
+                waited = time.monotonic()
+                with self._host_slot(url):
+                    self.rate_limiter.acquire()
+                    start = time.monotonic()
+                    METRICS.observe("stage_seconds", start - waited, stage="rate_limit_wait")
+                    try:
+                        response = self.session.get(url, headers=headers, timeout=TIMEOUT)
+                    except requests.RequestException as e:
+                        error = e
+                    latency = time.monotonic() - start
+                    if response is not None:
+                        self.rate_limiter.record(latency, response.status_code, response.headers.get("Retry-After"))
+                    else:
+                        self.rate_limiter.record(latency, None)
+                METRICS.observe("http_request_seconds", latency, endpoint=endpoint)
+                if response is not None:
+                    METRICS.inc("http_requests_total", endpoint=endpoint, status=response.status_code)
+                    METRICS.inc("http_bytes_total", len(response.content), endpoint=endpoint)
+                else:
+                    METRICS.inc("http_requests_total", endpoint=endpoint, status="error")
+
+                retryable = error is not None or response.status_code in HTTP_RETRY_STATUS
+                if not retryable:
+                    breaker.success()
+                    return response
+                breaker.failure()
+            finally:
+                # Una excepción inesperada no debe dejar la prueba half-open tomada
+                breaker.release()
+            if attempt >= self.retries:
+                if error is not None:
+                    raise error
+                return response
+
+            attempt += 1
+            with self._lock:
+                self.retry_count += 1
+            METRICS.inc("http_retries_total", endpoint=endpoint)
+            # Backoff exponencial con "full jitter"; el Retry-After lo aplica el limitador
+            backoff = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+            METRICS.observe("stage_seconds", backoff, stage="backoff")
+            time.sleep(backoff)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+import os, json
+from pathlib import Path
+from typing import Optional
+from ..domain.ports import CheckpointPort
+
+class JsonCheckpointAdapter(CheckpointPort):
+    """
+    Checkpoint de una corrida (categoría, archivo de salida) en
+    exito_scraper/data/<output>.<categoria>.checkpoint.json
+    """
+
+    def __init__(self, output: str, categoria: str):
+        base_dir = Path(__file__).parent.parent / "data"  # exito_scraper/data/
+        base_dir.mkdir(exist_ok=True)
+        self.path = base_dir / f"{Path(output).name}.{categoria}.checkpoint.json"
+
+    def load(self) -> Optional[dict]:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, state: dict) -> None:
+        # Escribir en un temporal y reemplazar: el checkpoint nunca queda a medias
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
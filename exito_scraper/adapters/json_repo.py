@@ -1,50 +1,139 @@
 from __future__ import annotations
-import json
-from typing import Iterable
+import json, os
+from typing import BinaryIO, Iterable, Optional
 from ..domain.ports import RepositoryPort
-from ..domain.producto import Producto
+from ..domain.producto import Producto, BASE_FIELDS
+from ..utils.compression import inspect_stream, iter_decompressed, open_binary, open_text, split_compression
+from ..utils.json_codec import dumps_line, loads
+from ..utils.json_stream import JsonArrayWriter, iter_lines
+from ..utils.metrics import METRICS
 from pathlib import Path
 
 class JsonRepositoryAdapter(RepositoryPort):
-    def __init__(self, filename: str, generate_formatted: bool = True):
+    """
+    Escribe JSONL (una línea por producto). Con extensión .jsonl.gz o
+    .jsonl.zst la salida se comprime en streaming: un solo handle abierto
+    durante toda la corrida, vaciado (flush) al final de cada página para que
+    lo ya escrito sea legible aunque el proceso se interrumpa.
+    """
+
+    def __init__(self, filename: str, generate_formatted: bool = True, columns: tuple = BASE_FIELDS):
         # Usar ruta relativa desde el módulo exito_scraper/data
         base_dir = Path(__file__).parent.parent / "data"  # exito_scraper/data/
         base_dir.mkdir(exist_ok=True)  # Crear si no existe
-        
+
         self.path = base_dir / filename
+        self.compression = split_compression(self.path)[1]
         self.generate_formatted = generate_formatted
-        self.productos_buffer = []
+        self.columns = tuple(columns)
+        self._persisted = 0
+        self._handle: Optional[BinaryIO] = None
+        # Bytes JSONL (sin comprimir) escritos en el archivo, incluidas corridas previas
+        self._offset: Optional[int] = None
 
     def persist(self, productos: Iterable[Producto]) -> None:
-        # Guardar en formato JSONL (una línea por producto)
-        with self.path.open("a", encoding="utf-8") as f:
-            for p in productos:
-                producto_dict = p.to_dict()
-                self.productos_buffer.append(producto_dict)
-                f.write(json.dumps(producto_dict, ensure_ascii=False) + "\n")
-        
-        # Generar también archivo JSON formateado si está habilitado
+        # Guardar en formato JSONL (una línea por producto, codificada directamente a bytes)
+        lines = [dumps_line(p.as_dict(self.columns)) for p in productos]
+        if not lines:
+            return
+        data = b"".join(lines)
+        f = self._open()
+        f.write(data)
+        f.flush()
+        self._offset += len(data)
+        self._persisted += len(lines)
+
+    def _open(self) -> BinaryIO:
+        if self._handle is None:
+            if self._offset is None:
+                self._offset = self._current_size()
+            self._handle = open_binary(self.path, "ab")
+        return self._handle
+
+    def _current_size(self) -> int:
+        """Bytes JSONL ya presentes (para archivos comprimidos hay que descomprimir)."""
+        if not self.path.exists():
+            return 0
+        if not self.compression:
+            return self.path.stat().st_size
+        size, complete = inspect_stream(self.path)
+        if not complete:
+            # Corrida anterior terminada a la fuerza: el último miembro/frame está
+            # truncado y uno nuevo agregado detrás dejaría el archivo ilegible.
+            # Se reescribe lo legible, hasta la última línea completa.
+            size = self._rewrite_compressed(size)
+            print(f"{self.path.name}: stream comprimido incompleto de una corrida interrumpida; "
+                  f"se conservan {size} bytes legibles")
+        return size
+
+    def commit_token(self) -> int:
+        # Bytes JSONL tras la última página completa
+        if self._offset is None:
+            self._offset = self._current_size()
+        return self._offset
+
+    def rollback(self, token) -> None:
+        """Descarta lo escrito después de token (filas a medio escribir)."""
+        if token is None or not self.path.exists():
+            return
+        token = int(token)
+        if not self.compression:
+            if self.path.stat().st_size > token:
+                with self.path.open("r+b") as f:
+                    f.truncate(token)
+        else:
+            # No se puede truncar un stream comprimido: se reescriben los primeros token bytes
+            token = self._rewrite_compressed(token)
+        self._offset = token
+
+    def _rewrite_compressed(self, limit: int) -> int:
+        """
+        Reescribe el archivo comprimido con sus primeros limit bytes JSONL, sin
+        una última línea incompleta, como un stream nuevo (un solo miembro o
+        frame completo). Retorna los bytes JSONL conservados.
+        """
+        tmp = self.path.with_name(split_compression(self.path)[0].name + ".tmp" + self.compression)
+        written, pending = 0, b""
+        with open_binary(tmp, "wb") as dst:
+            remaining = limit
+            for chunk in iter_decompressed(self.path):
+                data = pending + chunk[:remaining]
+                remaining -= len(chunk)
+                cut = data.rfind(b"\n") + 1
+                dst.write(data[:cut])
+                written += cut
+                pending = data[cut:]
+                if remaining <= 0:
+                    break
+        os.replace(tmp, self.path)
+        return written
+
+    def finalize(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        # Generar el archivo JSON formateado una sola vez al final de la corrida
         if self.generate_formatted:
             self._generate_formatted_json()
-    
+
     def _generate_formatted_json(self) -> None:
-        """Genera un archivo JSON formateado con todos los productos"""
-        if not self.productos_buffer:
+        """
+        Genera un archivo JSON formateado con todos los productos del JSONL
+        (comprimido igual que el JSONL). Se procesa línea por línea: la
+        memoria no depende del número de productos.
+        """
+        if not self._persisted or not self.path.exists():
             return
-            
-        # Leer todos los productos del archivo JSONL existente
-        all_productos = []
-        if self.path.exists():
-            with self.path.open("r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            all_productos.append(json.loads(line))
-                        except json.JSONDecodeError:
-                            continue
-        
-        # Crear archivo JSON formateado
-        formatted_path = self.path.with_name(self.path.stem + '_formatted.json')
-        with formatted_path.open("w", encoding="utf-8") as f:
-            json.dump(all_productos, f, indent=2, ensure_ascii=False)
+
+        # Misma salida que json.dump(lista, indent=2), escrita de forma incremental
+        base = split_compression(self.path)[0]
+        formatted_path = base.with_name(base.stem + '_formatted.json' + self.compression)
+        with METRICS.timer("stage_seconds", stage="formatted_json"), \
+                open_text(self.path, "r") as src, open_text(formatted_path, "w") as out:
+            writer = JsonArrayWriter(out)
+            for _, line in iter_lines(src):
+                try:
+                    writer.write(loads(line))
+                except json.JSONDecodeError:
+                    continue
+            writer.close()
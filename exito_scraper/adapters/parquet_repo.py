@@ -0,0 +1,74 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable, List, Optional
+from ..domain.producto import Producto, BASE_FIELDS, INTEGER_FIELDS
+from ..domain.ports import RepositoryPort
+from ..config import PARQUET_ROW_GROUP_SIZE, PARQUET_COMPRESSION
+
+try:  # dependencia opcional: pip install pyarrow
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Columnas con pocos valores distintos: se guardan como diccionario + índices
+DICTIONARY_FIELDS = ["categoria", "marca", "moneda", "fuente"]
+
+class ParquetRepositoryAdapter(RepositoryPort):
+    """
+    Escribe los productos en un archivo Parquet columnar y comprimido.
+
+    Las páginas se acumulan en memoria hasta completar row_group_size filas y
+    cada lote se escribe como un row group. El archivo solo es legible tras
+    finalize() (Parquet escribe el índice al cerrar), por eso este formato no
+    admite --resume. Tampoco admite agregar filas: si el archivo ya existe se
+    rechaza en lugar de sobrescribirlo.
+    """
+
+    def __init__(self, filename: str, row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+                 compression: str = PARQUET_COMPRESSION, columns: tuple = BASE_FIELDS):
+        if pa is None:
+            raise ImportError("La salida .parquet requiere pyarrow: pip install pyarrow")
+        # Usar ruta relativa desde el módulo exito_scraper/data
+        base_dir = Path(__file__).parent.parent / "data"  # exito_scraper/data/
+        base_dir.mkdir(exist_ok=True)  # Crear si no existe
+
+        self.path = base_dir / filename
+        if self.path.exists():
+            raise FileExistsError(f"{self.path} ya existe y Parquet no admite agregar filas; "
+                                  f"use otro --output o elimine el archivo")
+        self.row_group_size = max(1, int(row_group_size))
+        self.compression = compression
+        self.columns = tuple(columns)
+        self.schema = pa.schema([
+            (name, pa.int64() if name in INTEGER_FIELDS else pa.string()) for name in self.columns
+        ])
+        self._rows: List[tuple] = []
+        self._writer: Optional["pq.ParquetWriter"] = None
+
+    def persist(self, productos: Iterable[Producto]) -> None:
+        # Lista completa primero: una página interrumpida no queda a medias en el buffer
+        self._rows.extend([p.as_row(self.columns) for p in productos])
+        while len(self._rows) >= self.row_group_size:
+            batch = self._rows[:self.row_group_size]
+            del self._rows[:self.row_group_size]
+            self._write(batch)
+
+    def _write(self, rows: List[tuple]) -> None:
+        columns = list(zip(*rows))
+        table = pa.Table.from_arrays(
+            [pa.array(col, type=field.type) for col, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(str(self.path), self.schema, compression=self.compression,
+                                            use_dictionary=DICTIONARY_FIELDS)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+
+    def finalize(self) -> None:
+        if self._rows:
+            self._write(self._rows)
+            self._rows = []
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -0,0 +1,118 @@
+from __future__ import annotations
+import time, threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from ..config import (
+    RATE_LIMIT_INITIAL, RATE_LIMIT_MIN, RATE_LIMIT_MAX, RATE_LIMIT_BURST,
+    RATE_LIMIT_INCREASE, RATE_LIMIT_DECREASE, RATE_LIMIT_LATENCY_TARGET, RATE_LIMIT_SLOW_START,
+)
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket compartido entre hilos con ajuste AIMD de la tasa.
+
+    - Arranque lento (como TCP): hasta la primera señal de congestión (429,
+      5xx, error de conexión o latencia alta) cada respuesta rápida multiplica
+      la tasa por RATE_LIMIT_SLOW_START (x2: de 1 a 8 req/s en 3 respuestas).
+    - Respuesta rápida y exitosa: la tasa sube en RATE_LIMIT_INCREASE req/s.
+    - 429, 5xx o error de conexión: la tasa se multiplica por RATE_LIMIT_DECREASE.
+    - Latencia sobre RATE_LIMIT_LATENCY_TARGET: reducción suave (la mitad del castigo).
+    - Retry-After: nadie obtiene tokens hasta que pase el tiempo indicado.
+    """
+
+    def __init__(self, rate: float = RATE_LIMIT_INITIAL, min_rate: float = RATE_LIMIT_MIN,
+                 max_rate: float = RATE_LIMIT_MAX, burst: float = RATE_LIMIT_BURST,
+                 increase: float = RATE_LIMIT_INCREASE, decrease: float = RATE_LIMIT_DECREASE,
+                 latency_target: float = RATE_LIMIT_LATENCY_TARGET,
+                 slow_start: float = RATE_LIMIT_SLOW_START):
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.burst = max(1.0, burst)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.slow_start_factor = max(1.0, slow_start)
+        # Fase de arranque: termina con la primera señal de congestión
+        self.slow_start = self.slow_start_factor > 1.0
+        self._rate = min(max(rate, min_rate), self.max_rate)
+        self._tokens = 1.0
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        # Los hilos en espera se despiertan cuando cambia la tasa (p. ej. en el arranque)
+        self._changed = threading.Condition(self._lock)
+        self.throttled = 0   # respuestas 429 / 5xx / errores de conexión
+        self.requests = 0
+
+    @property
+    def rate(self) -> float:
+        """Tasa actual en requests por segundo."""
+        return self._rate
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"rate": round(self._rate, 3), "requests": self.requests, "throttled": self.throttled,
+                    "slow_start": self.slow_start}
+
+    def acquire(self) -> None:
+        """Bloquea hasta que haya un token disponible."""
+        with self._changed:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self.requests += 1
+                    return
+                else:
+                    wait = (1.0 - self._tokens) / self._rate
+                # Espera calculada con la tasa actual; record() despierta antes si cambia
+                self._changed.wait(wait)
+
+    def record(self, latency: float, status: Optional[int], retry_after: Optional[str] = None) -> None:
+        """Ajusta la tasa según el resultado de un request (status None = error de red)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if status is None or status == 429 or status >= 500:
+                self.throttled += 1
+                self.slow_start = False
+                self._rate = max(self.min_rate, self._rate * self.decrease)
+                delay = self._parse_retry_after(retry_after)
+                if delay:
+                    self._blocked_until = max(self._blocked_until, now + delay)
+                    self._tokens = 0.0
+            elif latency > self.latency_target:
+                self.slow_start = False
+                self._rate = max(self.min_rate, self._rate * (1 + self.decrease) / 2)
+            elif self.slow_start:
+                self._rate = min(self.max_rate, self._rate * self.slow_start_factor)
+            else:
+                self._rate = min(self.max_rate, self._rate + self.increase)
+            self._changed.notify_all()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> float:
+        """Retry-After puede ser segundos o una fecha HTTP."""
+        if not value:
+            return 0.0
+        value = value.strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0.0
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import sqlite3, threading, time
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from ..config import RATING_CACHE_MAX_AGE_SECONDS
+
+class SqliteRatingStore:
+    """
+    Caché persistente de calificaciones por producto (productId o linkText).
+    Guarda (rating, review_count, fetched_at) y considera vencidas las
+    entradas más antiguas que max_age_seconds.
+    """
+
+    def __init__(self, path: str, max_age_seconds: int = RATING_CACHE_MAX_AGE_SECONDS):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ratings ("
+            " product_key TEXT PRIMARY KEY,"
+            " rating TEXT NOT NULL,"
+            " review_count TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_fresh(self, keys: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        """Retorna {key: (rating, review_count)} solo para entradas vigentes."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        min_fetched_at = time.time() - self.max_age_seconds
+        found: Dict[str, Tuple[str, str]] = {}
+        with self._lock:
+            # SQLite limita el número de parámetros por consulta
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT product_key, rating, review_count FROM ratings "
+                    f"WHERE product_key IN ({marks}) AND fetched_at >= ?",
+                    (*chunk, min_fetched_at),
+                )
+                for key, rating, review_count in rows:
+                    found[key] = (rating, review_count)
+        return found
+
+    def put_many(self, rows: Iterable[Tuple[str, str, str]]) -> None:
+        """Inserta o actualiza filas (key, rating, review_count)."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO ratings (product_key, rating, review_count, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(product_key) DO UPDATE SET rating = excluded.rating, "
+                "review_count = excluded.review_count, fetched_at = excluded.fetched_at",
+                [(key, rating, review_count, now) for key, rating, review_count in rows],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
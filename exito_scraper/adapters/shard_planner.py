@@ -0,0 +1,96 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from ..config import VTEX_MAX_ITEMS, ITEMS_PER_PAGE, SHARD_PRICE_RANGE, SHARD_MIN_PRICE_SPAN
+
+@dataclass(frozen=True)
+class Shard:
+    """Subconjunto de una categoría que la API puede paginar completo."""
+    path: str
+    fq: Optional[str]
+    total: int
+
+    @property
+    def pages(self) -> int:
+        return -(-min(self.total, VTEX_MAX_ITEMS) // ITEMS_PER_PAGE)
+
+def price_fq(lo: int, hi: Optional[int]) -> str:
+    """hi=None deja el rango abierto hacia arriba (P[lo TO *])."""
+    return f"P[{lo} TO {'*' if hi is None else hi}]"
+
+class VtexShardPlanner:
+    """
+    Divide una categoría en shards bajo el límite de paginación de VTEX.
+
+    Primero intenta con las subcategorías indicadas (paths), y cada path que
+    siga por encima del límite se parte recursivamente en rangos de precio
+    fq=P[min TO max], más un rango abierto P[max TO *] para los precios por
+    encima. Los rangos vecinos comparten el precio del borde: los duplicados
+    se eliminan luego por productId.
+
+    Tras planificar, total es el total de la categoría sin filtros y covered
+    la suma de los shards. covered < total indica productos que ningún shard
+    alcanza (p. ej. sin precio, o subcategorías que no cubren todo el path).
+
+    count(path, fq) debe retornar el total de productos para ese filtro.
+    """
+
+    def __init__(self, count: Callable[[str, Optional[str]], int],
+                 price_range: Tuple[int, int] = SHARD_PRICE_RANGE,
+                 ceiling: int = VTEX_MAX_ITEMS):
+        self.count = count
+        self.price_range = price_range
+        self.ceiling = ceiling
+        self.total = 0
+        self.covered = 0
+
+    def plan(self, path: str, subpaths: Optional[List[str]] = None) -> List[Shard]:
+        self.total = self.count(path, None)
+        if self.total <= self.ceiling:
+            shards = [Shard(path, None, self.total)] if self.total else []
+        elif subpaths:
+            shards = []
+            for sub in subpaths:
+                sub_total = self.count(sub, None)
+                if sub_total <= self.ceiling:
+                    if sub_total:
+                        shards.append(Shard(sub, None, sub_total))
+                else:
+                    shards.extend(self._split_price(sub, *self.price_range))
+        else:
+            shards = self._split_price(path, *self.price_range)
+
+        self.covered = sum(s.total for s in shards)
+        if self.covered < self.total:
+            print(f"Aviso: los shards de {path} suman {self.covered} de {self.total} productos; "
+                  f"{self.total - self.covered} no quedan en ningún shard (sin precio o fuera de las subcategorías)")
+        return shards
+
+    def _split_price(self, path: str, lo: int, hi: int) -> List[Shard]:
+        shards: List[Shard] = []
+        stack = [(lo, hi)]
+        while stack:
+            a, b = stack.pop()
+            fq = price_fq(a, b)
+            total = self.count(path, fq)
+            if total == 0:
+                continue
+            if total <= self.ceiling or b - a <= SHARD_MIN_PRICE_SPAN:
+                if total > self.ceiling:
+                    print(f"Aviso: shard {path} {fq} sigue con {total} productos (no se puede dividir más)")
+                shards.append(Shard(path, fq, total))
+                continue
+            mid = (a + b) // 2
+            # Se apila primero la mitad alta para recorrer los precios en orden
+            stack.append((mid, b))
+            stack.append((a, mid))
+
+        # Precios por encima del rango: un shard abierto, sin dividir
+        fq = price_fq(hi, None)
+        total = self.count(path, fq)
+        if total > self.ceiling:
+            print(f"Aviso: shard {path} {fq} sigue con {total} productos (amplíe SHARD_PRICE_RANGE)")
+        if total:
+            shards.append(Shard(path, fq, total))
+        return shards
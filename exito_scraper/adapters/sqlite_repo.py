@@ -0,0 +1,70 @@
+from __future__ import annotations
+import sqlite3, threading
+from pathlib import Path
+from typing import Iterable
+from ..domain.producto import Producto, BASE_FIELDS, INTEGER_FIELDS
+from ..domain.ports import RepositoryPort
+
+class SqliteRepositoryAdapter(RepositoryPort):
+    """
+    Guarda los productos en una tabla SQLite con una fila por producto
+    (clave: link, o categoría + título si no tiene link). Volver a extraer
+    un producto actualiza su fila en lugar de duplicarlo.
+
+    Cada página se arma completa y se escribe con un solo executemany dentro
+    de una transacción. Si la corrida se interrumpe a mitad de página, el
+    iterador de productos falla antes del executemany (ver RepositoryPort.persist):
+    una página a medio persistir nunca queda en la base, así que no hace
+    falta rollback al reanudar.
+    """
+
+    def __init__(self, filename: str, columns: tuple = BASE_FIELDS):
+        # Usar ruta relativa desde el módulo exito_scraper/data
+        base_dir = Path(__file__).parent.parent / "data"  # exito_scraper/data/
+        base_dir.mkdir(exist_ok=True)  # Crear si no existe
+
+        self.path = base_dir / filename
+        self.columns = tuple(columns)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        # WAL: los lectores pueden consultar la base mientras el scraper escribe
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        definitions = ", ".join(self._column_def(name) for name in self.columns)
+        self._conn.executescript(
+            f"CREATE TABLE IF NOT EXISTS productos (product_key TEXT PRIMARY KEY, {definitions});"
+            "CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos (categoria);"
+            "CREATE INDEX IF NOT EXISTS idx_productos_marca ON productos (marca);"
+            "CREATE INDEX IF NOT EXISTS idx_productos_fecha ON productos (fecha_extraccion);"
+        )
+        # Una base creada sin alguna columna (p. ej. tipo_cambio, solo con --delta) se amplía
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(productos)")}
+        for name in self.columns:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE productos ADD COLUMN {self._column_def(name)}")
+        self._conn.commit()
+        names = ", ".join(f'"{name}"' for name in self.columns)
+        updates = ", ".join(f'"{name}" = excluded."{name}"' for name in self.columns)
+        self._upsert_sql = (
+            f"INSERT INTO productos (product_key, {names}) VALUES ({', '.join('?' * (len(self.columns) + 1))}) "
+            f"ON CONFLICT(product_key) DO UPDATE SET {updates}"
+        )
+
+    @staticmethod
+    def _column_def(name: str) -> str:
+        return f'"{name}" {"INTEGER" if name in INTEGER_FIELDS else "TEXT"}'
+
+    @staticmethod
+    def _key(p: Producto) -> str:
+        return p.link or f"{p.categoria}:{p.titulo}"
+
+    def persist(self, productos: Iterable[Producto]) -> None:
+        rows = [(self._key(p), *p.as_row(self.columns)) for p in productos]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(self._upsert_sql, rows)
+
+    def finalize(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Sequence
+from ..domain.ports import ScraperPort, RepositoryPort, CheckpointPort
+from .scrape_usecase import ScrapeCategoryUseCase
+
+class ScrapeAllCategoriesUseCase:
+    """
+    Extrae varias categorías en un solo proceso. Las páginas de todas las
+    categorías se intercalan en un pool compartido (mismo scraper, misma
+    sesión HTTP y mismo límite de concurrencia por host); cada categoría se
+    persiste en orden en su propio repositorio.
+    """
+
+    def __init__(self, scraper: ScraperPort, repo_factory: Callable[[str], RepositoryPort], workers: int = 1,
+                 checkpoint_factory: Optional[Callable[[str], CheckpointPort]] = None, resume: bool = False):
+        self.scraper = scraper
+        self.repo_factory = repo_factory
+        self.workers = max(1, int(workers))
+        self.checkpoint_factory = checkpoint_factory
+        self.resume = resume
+
+    def run(self, categorias: Sequence[str], pages: Optional[int] = 1) -> Dict[str, BaseException]:
+        """
+        pages=None recorre cada catálogo completo. Retorna {categoria: error}
+        para las categorías que fallaron.
+        """
+        usecases: Dict[str, ScrapeCategoryUseCase] = {}
+        for c in categorias:
+            checkpoint = self.checkpoint_factory(c) if self.checkpoint_factory else None
+            usecases[c] = ScrapeCategoryUseCase(self.scraper, self.repo_factory(c), workers=self.workers,
+                                                checkpoint=checkpoint, resume=self.resume)
+        errors: Dict[str, BaseException] = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Cada categoría mantiene una ventana acotada de páginas en el pool
+            # compartido, así las páginas de todas las categorías se intercalan.
+            def persist_category(c: str) -> None:
+                try:
+                    usecases[c].prepare(c, pages)
+                    usecases[c].consume(usecases[c].with_finish(c, usecases[c].page_stream(c, pool)))
+                except BaseException as e:
+                    errors[c] = e
+
+            writers = [threading.Thread(target=persist_category, args=(c,), name=f"writer-{c}") for c in categorias]
+            for t in writers:
+                t.start()
+            for t in writers:
+                t.join()
+
+        return errors
@@ -1,17 +1,256 @@
 from __future__ import annotations
-from typing import Iterable
-from ..domain.ports import ScraperPort, RepositoryPort
+import queue, threading, time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+from ..domain.ports import ScraperPort, RepositoryPort, CheckpointPort
+from ..domain.producto import Producto
+from ..config import STREAM_QUEUE_SIZE, ITEMS_PER_PAGE, VTEX_MAX_ITEMS
+from ..utils.metrics import METRICS
+
+class _CountingIterable:
+    """Envuelve los productos de una página y cuenta cuántos se consumieron."""
+
+    def __init__(self, productos: Iterable[Producto]):
+        self._productos = productos
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Producto]:
+        for p in self._productos:
+            self.count += 1
+            yield p
+
+class _PageEnd:
+    """Marcador de fin de página que viaja por la cola junto a los productos."""
+    __slots__ = ("page",)
+
+    def __init__(self, page: int):
+        self.page = page
+
+_STOP = object()
+
+class _PageAborted(Exception):
+    """La corrida se detuvo a mitad de página: el repositorio no debe guardar lo recibido de ella."""
 
 class ScrapeCategoryUseCase:
-    def __init__(self, scraper: ScraperPort, repo: RepositoryPort):
+    def __init__(self, scraper: ScraperPort, repo: RepositoryPort, workers: int = 1,
+                 queue_size: int = STREAM_QUEUE_SIZE,
+                 checkpoint: Optional[CheckpointPort] = None, resume: bool = False):
         self.scraper = scraper
         self.repo = repo
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self._contador_total = 0
+        self._completed: List[int] = []
+        self._limit: Optional[int] = None
+        self._categoria: Optional[str] = None
+
+    def run(self, categoria: str, pages: Optional[int] = 1) -> None:
+        """pages=None recorre todo el catálogo (según el total informado por el scraper)."""
+        self.prepare(categoria, pages)
+        self.consume(self.with_finish(categoria, self.page_stream(categoria)))
+
+    def prepare(self, categoria: str, pages: Optional[int]) -> None:
+        """
+        Carga (con resume) o reinicia el checkpoint. Al reanudar se descarta
+        cualquier página a medio persistir y se omiten las ya completas.
+        """
+        self.scraper.begin(categoria, resume=self.resume)
+        self._categoria = categoria
+        self._limit = pages
+        if self.checkpoint is None:
+            return
+        state = self.checkpoint.load() if self.resume else None
+        if state:
+            self.repo.rollback(state.get("repo_token"))
+            self._contador_total = int(state.get("contador_total", 0))
+            self._completed = sorted(int(p) for p in state.get("completed_pages", []))
+        else:
+            self.checkpoint.clear()
+
+    def _candidates(self, categoria: str) -> Iterator[int]:
+        """
+        Páginas pendientes en orden. El límite se vuelve a consultar en cada
+        paso: tras la primera respuesta el scraper ya conoce el total.
+        """
+        done = set(self._completed)
+        p = 1
+        while True:
+            last = self.scraper.page_count(categoria)
+            if last is None and self._limit is None:
+                last = -(-VTEX_MAX_ITEMS // ITEMS_PER_PAGE)
+            if (self._limit is not None and p > self._limit) or (last is not None and p > last):
+                return
+            if p not in done:
+                yield p
+            p += 1
 
-    def run(self, categoria: str, pages: int = 1) -> None:
-        for p in range(1, pages + 1):
-            productos = list(self.scraper.scrape(categoria, p))
-            if not productos:
+    def consume(self, page_source: Iterable[Tuple[int, Iterable[Producto]]]) -> None:
+        """
+        Persiste, en orden, las páginas (numero, productos) de page_source.
+
+        Los productos fluyen hacia un hilo escritor por una cola acotada: la
+        escritura en disco se solapa con la red y la memoria depende del
+        tamaño de la cola, no del tamaño de la página.
+        """
+        q: "queue.Queue[object]" = queue.Queue(maxsize=self.queue_size)
+        errors: list[BaseException] = []
+        writer = threading.Thread(target=self._writer, args=(q, errors), name="repo-writer")
+        writer.start()
+        try:
+            for page, productos in page_source:
+                for p in productos:
+                    if errors:
+                        break
+                    q.put(p)
+                q.put(_PageEnd(page))
+                if errors:
+                    break
+        finally:
+            q.put(_STOP)
+            writer.join()
+            with METRICS.timer("stage_seconds", stage="finalize"):
+                self.repo.finalize()
+        if errors:
+            raise errors[0]
+
+    def with_finish(self, categoria: str, page_source: Iterable[Tuple[int, Iterable[Producto]]]
+                    ) -> Iterator[Tuple[int, Iterable[Producto]]]:
+        """Agrega al final los productos de scraper.finish() como página 0."""
+        yield from page_source
+        yield 0, self.scraper.finish(categoria)
+
+    def page_stream(self, categoria: str, pool: Optional[Executor] = None
+                    ) -> Iterator[Tuple[int, Iterable[Producto]]]:
+        """
+        Entrega (pagina, productos) en orden hasta agotar las páginas pedidas o
+        el catálogo. Con un solo worker y sin pool compartido, cada página se
+        consume en streaming; si no, se descargan en paralelo dentro de una
+        ventana acotada, planificada a partir del total de la primera página.
+        """
+        if pool is None and self.workers == 1:
+            for p in self._candidates(categoria):
+                productos = _CountingIterable(self.scraper.scrape(categoria, p))
+                yield p, productos
+                if self._catalog_ended(categoria, p, productos.count):
+                    return
+            return
+
+        own_pool = pool is None
+        if own_pool:
+            pool = ThreadPoolExecutor(max_workers=self.workers)
+        window: Deque[Tuple[int, Future]] = deque()
+        try:
+            candidates = self._candidates(categoria)
+            # La primera página va sola: su respuesta trae el total del catálogo
+            first = next(candidates, None)
+            if first is None:
+                return
+            window.append((first, pool.submit(self._fetch_page, categoria, first)))
+            while window:
+                p, fut = window.popleft()
+                productos = fut.result()
+                if self._catalog_ended(categoria, p, len(productos)):
+                    yield p, productos
+                    return
+                while len(window) < 2 * self.workers:
+                    nxt = next(candidates, None)
+                    if nxt is None:
+                        break
+                    window.append((nxt, pool.submit(self._fetch_page, categoria, nxt)))
+                yield p, productos
+        finally:
+            for _, fut in window:
+                fut.cancel()
+            if own_pool:
+                pool.shutdown(wait=True)
+
+    def _catalog_ended(self, categoria: str, page: int, emitted: int) -> bool:
+        """
+        Sin total conocido, una página vacía marca el fin del catálogo. Se
+        decide por los items que trajo la página, no por los productos
+        entregados: en modo delta una página sin cambios no entrega ninguno.
+        """
+        raw = self.scraper.page_size(categoria, page)
+        if self.scraper.page_count(categoria) is not None:
+            return False
+        return (emitted if raw is None else raw) == 0
+
+    def _fetch_page(self, categoria: str, page: int) -> List[Producto]:
+        return list(self.scraper.scrape(categoria, page))
+
+    def _writer(self, q: "queue.Queue[object]", errors: list) -> None:
+        """Consume la cola y persiste una llamada por página."""
+        while True:
+            first = q.get()
+            if first is _STOP:
+                return
+            if isinstance(first, _PageEnd):
                 # Si una página no trae resultados, puedes romper o seguir.
                 # Aquí seguimos para tolerar intermitencias.
+                self._page_done(first.page)
                 continue
-            self.repo.persist(productos)
+            state = {"stopped": False, "page": None, "wait": 0.0, "count": 0}
+            try:
+                if errors:
+                    raise RuntimeError("escritor detenido")
+                started = time.perf_counter()
+                self.repo.persist(self._page_items(first, q, state))
+                # Sin contar la espera de productos en la cola (eso es tiempo del scraper)
+                METRICS.observe("stage_seconds", time.perf_counter() - started - state["wait"], stage="persist")
+                METRICS.observe("stage_seconds", state["wait"], stage="queue_wait")
+                METRICS.inc("products_total", state["count"], categoria=self._categoria)
+                if state["page"] is not None:
+                    self._page_done(state["page"])
+            except _PageAborted:
+                # El productor falló a mitad de página; su excepción es la que se propaga
+                return
+            except BaseException as e:
+                if not errors:
+                    errors.append(e)
+                # Seguir drenando para no bloquear al productor
+                while not state["stopped"] and state["page"] is None:
+                    item = q.get()
+                    if item is _STOP:
+                        return
+                    if isinstance(item, _PageEnd):
+                        break
+            if state["stopped"]:
+                return
+
+    def _page_items(self, first: object, q: "queue.Queue[object]", state: dict) -> Iterator[Producto]:
+        item: Optional[object] = first
+        while True:
+            if isinstance(item, _PageEnd):
+                state["page"] = item.page
+                return
+            if item is _STOP:
+                # Fin de la corrida a mitad de página: se interrumpe el persist para
+                # que el repositorio descarte la página incompleta
+                state["stopped"] = True
+                raise _PageAborted()
+            # Renumerar en orden de persistencia para que el contador global sea
+            # determinístico sin importar el orden en que terminen las descargas.
+            self._contador_total += 1
+            item.contador_extraccion_total = self._contador_total
+            state["count"] += 1
+            yield item
+            waited = time.perf_counter()
+            item = q.get()
+            state["wait"] += time.perf_counter() - waited
+
+    def _page_done(self, page: int) -> None:
+        """Registra la página como completa una vez persistida."""
+        if page:
+            # La página 0 es la de scraper.finish() (eliminados en modo delta)
+            METRICS.inc("pages_total", categoria=self._categoria)
+        if self.checkpoint is None:
+            return
+        self._completed.append(page)
+        self.checkpoint.save({
+            "completed_pages": sorted(self._completed),
+            "contador_total": self._contador_total,
+            "repo_token": self.repo.commit_token(),
+        })
@@ -1,11 +1,17 @@
+import os
+
+# EXITO_BASE_HOST permite apuntar el scraper a otro host (p. ej. el servidor
+# local de benchmarks/vtex_stub_server.py) sin tocar el código
+BASE_HOST = os.environ.get("EXITO_BASE_HOST", "https://www.exito.com").rstrip("/")
+
 EXPECTED_URLS = {
-    "televisores": "https://www.exito.com/tecnologia/televisores?category-1=tecnologia&category-2=televisores&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
-    "celulares": "https://www.exito.com/tecnologia/celulares?category-1=tecnologia&category-2=celulares&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
-    "lavadoras": "https://www.exito.com/electrodomesticos/lavado-y-secado?category-1=electrodomesticos&category-2=lavado-y-secado&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
-    "refrigeracion": "https://www.exito.com/electrodomesticos/refrigeracion?category-1=electrodomesticos&category-2=refrigeracion&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
-    "audio": "https://www.exito.com/tecnologia/audio?category-1=tecnologia&category-2=audio&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
-    "videojuegos": "https://www.exito.com/tecnologia/consolas-y-videojuegos?category-1=tecnologia&category-2=consolas-y-videojuegos&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
-    "deportes": "https://www.exito.com/deportes-y-fitness?category-1=deportes-y-fitness&facets=category-1&sort=score_desc&page=1",
+    "televisores": f"{BASE_HOST}/tecnologia/televisores?category-1=tecnologia&category-2=televisores&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
+    "celulares": f"{BASE_HOST}/tecnologia/celulares?category-1=tecnologia&category-2=celulares&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
+    "lavadoras": f"{BASE_HOST}/electrodomesticos/lavado-y-secado?category-1=electrodomesticos&category-2=lavado-y-secado&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
+    "refrigeracion": f"{BASE_HOST}/electrodomesticos/refrigeracion?category-1=electrodomesticos&category-2=refrigeracion&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
+    "audio": f"{BASE_HOST}/tecnologia/audio?category-1=tecnologia&category-2=audio&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
+    "videojuegos": f"{BASE_HOST}/tecnologia/consolas-y-videojuegos?category-1=tecnologia&category-2=consolas-y-videojuegos&facets=category-1%2Ccategory-2&sort=score_desc&page=1",
+    "deportes": f"{BASE_HOST}/deportes-y-fitness?category-1=deportes-y-fitness&facets=category-1&sort=score_desc&page=1",
 }
 
 # Mapping categories to their API paths for VTEX catalog system
@@ -19,7 +25,17 @@ CATEGORY_API_PATHS = {
     "deportes": "deportes-y-fitness",
 }
 
-BASE_HOST = "https://www.exito.com"
+# Paginación de la API de búsqueda VTEX (_from/_to); no permite pasar de _from=2500
+ITEMS_PER_PAGE = 50
+VTEX_MAX_ITEMS = 2500
+
+# Sharding (--shard) para categorías por encima de VTEX_MAX_ITEMS: primero por
+# subcategoría (si se listan aquí) y luego por rangos de precio fq=P[min TO max]
+CATEGORY_SHARD_PATHS = {
+    # "celulares": ["tecnologia/celulares/smartphones", "tecnologia/celulares/accesorios-celulares"],
+}
+SHARD_PRICE_RANGE = (0, 100_000_000)   # COP
+SHARD_MIN_PRICE_SPAN = 1               # rango mínimo antes de rendirse
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                   "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -27,4 +43,61 @@ DEFAULT_HEADERS = {
     "Accept-Language": "es-CO,es;q=0.9",
 }
 TIMEOUT = 25
-REQUEST_DELAY_SECONDS = (1.0, 2.0)  # min, max
+
+# Limitador adaptativo (token bucket + AIMD), compartido por todos los requests
+RATE_LIMIT_INITIAL = 1.0          # requests por segundo al iniciar
+RATE_LIMIT_MIN = 0.2
+RATE_LIMIT_MAX = 8.0
+RATE_LIMIT_BURST = 2.0            # tokens acumulables
+RATE_LIMIT_INCREASE = 0.1         # incremento aditivo por respuesta rápida
+RATE_LIMIT_SLOW_START = 2.0       # arranque: factor por respuesta rápida hasta la primera señal de congestión
+RATE_LIMIT_DECREASE = 0.5         # factor multiplicativo ante 429/5xx
+RATE_LIMIT_LATENCY_TARGET = 2.0   # segundos; por encima se reduce la tasa
+
+# Concurrencia: número máximo de requests simultáneos hacia un mismo host
+MAX_CONCURRENT_PER_HOST = 4
+
+# Transporte HTTP: pool de conexiones, reintentos y circuito por endpoint
+HTTP_POOL_SIZE = 10                       # conexiones por host en el pool de requests
+HTTP_RETRIES = 3                          # reintentos por GET (además del primer intento)
+HTTP_BACKOFF_BASE = 0.5                   # segundos; backoff = uniform(0, base * 2^intento)
+HTTP_BACKOFF_MAX = 10.0
+HTTP_RETRY_STATUS = (429, 500, 502, 503, 504)
+CIRCUIT_FAILURE_THRESHOLD = 5             # fallos seguidos para abrir el circuito
+CIRCUIT_RESET_SECONDS = 30.0              # tiempo abierto antes de probar de nuevo
+
+# Enriquecimiento de calificaciones desde la página de cada producto.
+# None = todos los productos de la página, 0 = ninguno, N = primeros N.
+RATING_ENRICH_LIMIT = 10
+RATING_WORKERS = 4
+
+# Caché HTTP en disco (--cache-dir): TTL en segundos por tipo de recurso
+HTTP_CACHE_TTL_SECONDS = {
+    "search": 60 * 60,        # respuestas JSON de la API de búsqueda VTEX
+    "product": 24 * 60 * 60,  # páginas HTML de producto (calificaciones)
+    "page": 60 * 60,          # páginas HTML de categoría (fallback)
+}
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Caché persistente de calificaciones (--rating-cache): antigüedad máxima
+RATING_CACHE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+# Salida Parquet (requiere pyarrow): filas por row group y compresión
+PARQUET_ROW_GROUP_SIZE = 10_000
+PARQUET_COMPRESSION = "zstd"
+
+# Salida JSONL comprimida (.jsonl.gz / .jsonl.zst; zstd requiere zstandard)
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Tamaño de la cola acotada entre el scraper y el hilo escritor del repositorio
+STREAM_QUEUE_SIZE = 200
+
+# Métricas de la corrida (reporte JSON / Prometheus): límites de los buckets
+# de latencia en segundos y muestras guardadas por histograma para p50/p95
+METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_MAX_SAMPLES = 10_000
+
+# Codec JSON para respuestas VTEX y salidas JSONL: "auto" usa orjson o msgspec
+# si están instalados (en ese orden) y si no la librería estándar
+JSON_BACKEND = os.environ.get("EXITO_JSON_BACKEND", "auto")
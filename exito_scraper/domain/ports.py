@@ -1,14 +1,67 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Iterable
+from typing import Any, Iterable, Optional
 from .producto import Producto
 
 class ScraperPort(ABC):
     @abstractmethod
     def scrape(self, categoria: str, page: int) -> Iterable[Producto]:
+        """Puede retornar un generador: los productos se consumen a medida que se normalizan."""
         ...
 
+    def begin(self, categoria: str, resume: bool = False) -> None:
+        """Se llama antes de la primera página de una corrida."""
+        return None
+
+    def page_count(self, categoria: str) -> Optional[int]:
+        """Número total de páginas de la categoría, si ya se conoce."""
+        return None
+
+    def page_size(self, categoria: str, page: int) -> Optional[int]:
+        """
+        Items que trajo la página antes de filtrarlos (p. ej. el modo delta no
+        entrega los que no cambiaron), si se conoce. Sin page_count(), una
+        página con 0 items marca el fin del catálogo.
+        """
+        return None
+
+    def finish(self, categoria: str) -> Iterable[Producto]:
+        """Productos adicionales al terminar la corrida (p. ej. eliminados en modo delta)."""
+        return []
+
 class RepositoryPort(ABC):
     @abstractmethod
     def persist(self, productos: Iterable[Producto]) -> None:
+        """
+        Recibe los productos de una página; puede ser un iterable perezoso. Si
+        la iteración falla (corrida interrumpida a mitad de página), no debe
+        quedar guardado ningún producto de esa página.
+        """
+        ...
+
+    def finalize(self) -> None:
+        """Se llama una vez al terminar la corrida (archivos derivados, cierres)."""
+        return None
+
+    def commit_token(self) -> Any:
+        """Marca serializable (JSON) del estado persistido tras la última página."""
+        return None
+
+    def rollback(self, token: Any) -> None:
+        """Descarta lo escrito después de commit_token() (página a medio persistir)."""
+        return None
+
+class CheckpointPort(ABC):
+    @abstractmethod
+    def load(self) -> Optional[dict]:
+        """Estado guardado ({"completed_pages", "contador_total", "repo_token"}) o None."""
+        ...
+
+    @abstractmethod
+    def save(self, state: dict) -> None:
+        """Guarda el estado de forma atómica."""
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
         ...
@@ -1,9 +1,10 @@
 from __future__ import annotations
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
 from typing import Optional
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True)
 class Producto:
     contador_extraccion_total: int
     contador_extraccion: int
@@ -23,10 +24,42 @@ class Producto:
     pagina: int
     fecha_extraccion: str
     extraction_status: str = field(default="OK")
+    # Modo delta: "NUEVO", "MODIFICADO" o "ELIMINADO" (vacío en corridas completas)
+    tipo_cambio: str = field(default="")
 
     @staticmethod
     def now_iso() -> str:
         return datetime.now().isoformat(timespec="seconds")
 
-    def to_dict(self) -> dict:
-        return asdict(self)
+    def as_row(self, columns: Optional[tuple] = None) -> tuple:
+        """Valores en el orden de columns (por defecto FIELDS, columnas del CSV)."""
+        return _getter(columns)(self)
+
+    def as_dict(self, columns: Optional[tuple] = None) -> dict:
+        # Todos los campos son escalares: no hace falta la copia profunda de asdict
+        columns = columns or FIELDS
+        return dict(zip(columns, _getter(columns)(self)))
+
+    to_dict = as_dict
+
+FIELDS = tuple(f.name for f in fields(Producto))
+# tipo_cambio solo tiene sentido en corridas --delta: las demás salidas
+# conservan las columnas de siempre
+BASE_FIELDS = tuple(name for name in FIELDS if name != "tipo_cambio")
+# Columnas enteras (el resto son texto) para esquemas tipados: SQLite, Parquet
+INTEGER_FIELDS = frozenset({"contador_extraccion_total", "contador_extraccion", "precio_valor", "pagina"})
+_GETTERS = {FIELDS: attrgetter(*FIELDS), BASE_FIELDS: attrgetter(*BASE_FIELDS)}
+
+
+def output_fields(delta: bool) -> tuple:
+    """Columnas de salida de una corrida (con tipo_cambio solo en modo delta)."""
+    return FIELDS if delta else BASE_FIELDS
+
+
+def _getter(columns: Optional[tuple]) -> attrgetter:
+    if columns is None:
+        return _GETTERS[FIELDS]
+    getter = _GETTERS.get(columns)
+    if getter is None:
+        getter = _GETTERS[columns] = attrgetter(*columns)
+    return getter
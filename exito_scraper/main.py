@@ -1,26 +1,147 @@
 from __future__ import annotations
 import argparse
+import cProfile
+import pstats
+import sys
 from pathlib import Path
 
-from .config import EXPECTED_URLS
+from .config import (
+    EXPECTED_URLS, RATING_ENRICH_LIMIT, RATING_WORKERS, RATING_CACHE_MAX_AGE_SECONDS, RATE_LIMIT_MAX,
+    MAX_CONCURRENT_PER_HOST, HTTP_POOL_SIZE,
+)
 from .adapters.exito_scraper_adapter import ExitoScraperAdapter
 from .adapters.json_repo import JsonRepositoryAdapter
 from .adapters.csv_repo import CsvRepositoryAdapter
+from .adapters.sqlite_repo import SqliteRepositoryAdapter
+from .adapters.parquet_repo import ParquetRepositoryAdapter
+from .adapters.http_cache import HttpCache
+from .adapters.rating_store import SqliteRatingStore
+from .adapters.rate_limiter import AdaptiveRateLimiter
+from .adapters.json_checkpoint import JsonCheckpointAdapter
+from .adapters.delta_index import SqliteDeltaIndex
 from .application.scrape_usecase import ScrapeCategoryUseCase
+from .application.scrape_all_usecase import ScrapeAllCategoriesUseCase
+from .domain.producto import output_fields
+from .utils.metrics import METRICS
 
-def _make_repo(output: str):
+DATA_DIR = Path(__file__).parent / "data"  # exito_scraper/data/
+
+def _make_repo(output: str, delta: bool = False):
     # Usar solo el nombre del archivo, la ruta se maneja internamente
     filename = Path(output).name
+    # La columna tipo_cambio solo se escribe en corridas --delta
+    columns = output_fields(delta)
     
     if filename.endswith('.csv'):
-        return CsvRepositoryAdapter(filename)
-    elif filename.endswith('.jsonl'):
-        return JsonRepositoryAdapter(filename, generate_formatted=True)
+        return CsvRepositoryAdapter(filename, columns=columns)
+    elif filename.endswith(('.db', '.sqlite')):
+        return SqliteRepositoryAdapter(filename, columns=columns)
+    elif filename.endswith('.parquet'):
+        return ParquetRepositoryAdapter(filename, columns=columns)
+    elif filename.endswith(('.jsonl', '.jsonl.gz', '.jsonl.zst')):
+        return JsonRepositoryAdapter(filename, generate_formatted=True, columns=columns)
     else:
         # Default to JSONL format 
         if not filename.endswith(('.json', '.jsonl')):
             filename = filename + '.jsonl'
-        return JsonRepositoryAdapter(filename, generate_formatted=True)
+        return JsonRepositoryAdapter(filename, generate_formatted=True, columns=columns)
+
+def _parse_rating_limit(value: str):
+    """'all' -> None (todos), 'none' -> 0, N -> primeros N productos por página."""
+    value = value.strip().lower()
+    if value == "all":
+        return None
+    if value == "none":
+        return 0
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("Use 'all', 'none' o un entero >= 0")
+    if n < 0:
+        raise argparse.ArgumentTypeError("Use 'all', 'none' o un entero >= 0")
+    return n
+
+def _parse_paginas(value: str):
+    """'all' -> None (todo el catálogo), N -> N páginas."""
+    if value.strip().lower() == "all":
+        return None
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("Use un entero >= 1 o 'all'")
+    return max(1, n)
+
+def _add_scraper_args(s: argparse.ArgumentParser) -> None:
+    """Opciones del scraper comunes a scrape y scrape-all."""
+    s.add_argument("--paginas", type=_parse_paginas, default=1,
+                   help="Numero de páginas a extraer (>=1) o 'all' para recorrer todo el catálogo")
+    s.add_argument("--resume", action="store_true",
+                   help="Continuar una corrida interrumpida desde su checkpoint (omite páginas ya persistidas)")
+    s.add_argument("--workers", type=int, default=1, help="Páginas a descargar en paralelo (>=1, limitado por MAX_CONCURRENT_PER_HOST)")
+    s.add_argument("--ratings", type=_parse_rating_limit, default=RATING_ENRICH_LIMIT,
+                   help="Productos por página a enriquecer con calificación: 'all', 'none' o N")
+    s.add_argument("--cache-dir", default=None, help="Directorio para caché HTTP en disco (desactivado si se omite)")
+    s.add_argument("--rating-cache", default=None, help="Archivo SQLite con calificaciones ya consultadas (desactivado si se omite)")
+    s.add_argument("--rating-max-age", type=float, default=RATING_CACHE_MAX_AGE_SECONDS / 3600,
+                   help="Horas tras las cuales una calificación guardada se vuelve a consultar")
+    s.add_argument("--rating-workers", type=int, default=RATING_WORKERS, help="Requests paralelos para calificaciones (>=1)")
+    s.add_argument("--delta", default=None,
+                   help="Archivo SQLite con el snapshot anterior: solo se emiten productos nuevos, modificados o eliminados")
+    s.add_argument("--max-per-host", type=int, default=MAX_CONCURRENT_PER_HOST,
+                   help="Requests simultáneos máximos hacia exito.com (el pool de conexiones se ajusta a este valor)")
+    s.add_argument("--max-rps", type=float, default=RATE_LIMIT_MAX, help="Tope de requests por segundo del limitador adaptativo")
+    s.add_argument("--shard", action="store_true",
+                   help="Dividir categorías de más de 2500 productos por subcategoría y rango de precio (usar con --paginas all)")
+    s.add_argument("--report", default=None,
+                   help="Reporte JSON de la corrida: tiempos por etapa, requests, bytes, reintentos y fallbacks "
+                        "(por defecto exito_scraper/data/<salida>.report.json)")
+    s.add_argument("--prometheus", default=None,
+                   help="Escribir también las métricas en formato de texto de Prometheus (textfile collector)")
+    s.add_argument("--profile", nargs="?", const="", default=None,
+                   help="Ejecutar bajo cProfile (hilo principal; use --workers 1 para incluir la descarga) y "
+                        "guardar las estadísticas en la ruta indicada (por defecto exito_scraper/data/<salida>.prof)")
+
+def _make_scraper(args) -> ExitoScraperAdapter:
+    cache = HttpCache(args.cache_dir) if args.cache_dir else None
+    rating_store = SqliteRatingStore(args.rating_cache, max_age_seconds=int(args.rating_max_age * 3600)) if args.rating_cache else None
+    return ExitoScraperAdapter(rating_limit=args.ratings, rating_workers=max(1, int(args.rating_workers)),
+                               cache=cache, rating_store=rating_store,
+                               rate_limiter=AdaptiveRateLimiter(max_rate=args.max_rps),
+                               pool_size=max(HTTP_POOL_SIZE, args.max_per_host, args.workers),
+                               max_per_host=max(1, int(args.max_per_host)),
+                               delta_index=SqliteDeltaIndex(args.delta) if args.delta else None,
+                               shard=args.shard)
+
+def _print_stage_summary() -> None:
+    """Tiempo acumulado por etapa, de mayor a menor."""
+    stages = []
+    for key, h in METRICS.snapshot()["histograms"].items():
+        if key.startswith("stage_seconds{"):
+            stages.append((h["sum"], key[len("stage_seconds{stage="):-1], h))
+    if not stages:
+        return
+    print("Tiempo por etapa (suma entre hilos):")
+    for total, stage, h in sorted(stages, reverse=True):
+        print(f"  {stage:<16}{total:>10.2f} s  n={h['count']:<7} p95={h['p95'] * 1000:.1f} ms")
+
+def _write_run_report(args, scraper: ExitoScraperAdapter, stem: str, status: str) -> None:
+    info = {
+        "comando": args.cmd,
+        "estado": status,
+        "argumentos": {k: v for k, v in vars(args).items() if k != "cmd"},
+        "limitador": scraper.rate_limiter.stats(),
+        "reintentos": scraper.transport.retry_count,
+    }
+    path = METRICS.write_report(args.report or DATA_DIR / f"{stem}.report.json", **info)
+    _print_stage_summary()
+    print(f"Reporte de la corrida: {path}")
+    if args.prometheus:
+        print(f"Métricas Prometheus: {METRICS.write_prometheus(args.prometheus)}")
+
+def _dump_profile(profiler: cProfile.Profile, path: Path) -> None:
+    profiler.dump_stats(path)
+    print(f"Perfil cProfile: {path} (python -m pstats {path})")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
 
 def main():
     parser = argparse.ArgumentParser(description="Scraper Exito.")
@@ -28,16 +149,71 @@ def main():
 
     s = sub.add_parser("scrape", help="Extraer productos por categoría")
     s.add_argument("--categoria", required=True, choices=sorted(EXPECTED_URLS.keys()), help="Categoría a scrapear")
-    s.add_argument("--paginas", type=int, default=1, help="Numero de páginas a extraer (>=1)")
-    s.add_argument("--output", required=True, help="Nombre del archivo de salida (.json, .jsonl o .csv) - se guarda en exito_scraper/data/")
+    s.add_argument("--output", required=True, help="Nombre del archivo de salida (.json, .jsonl, .jsonl.gz, .jsonl.zst, .csv, .db, .sqlite o .parquet) - se guarda en exito_scraper/data/; .parquet no puede existir de antes")
+    _add_scraper_args(s)
+
+    a = sub.add_parser("scrape-all", help="Extraer varias categorías en un solo proceso (un archivo por categoría)")
+    a.add_argument("--categorias", default=",".join(sorted(EXPECTED_URLS.keys())),
+                   help="Lista separada por comas (por defecto todas)")
+    a.add_argument("--formato", default="jsonl", choices=["jsonl", "jsonl.gz", "jsonl.zst", "csv", "db", "parquet"],
+                   help="Formato de salida; se genera <categoria>.<formato> en exito_scraper/data/ "
+                        "(con parquet, el archivo no puede existir de antes)")
+    _add_scraper_args(a)
 
     args = parser.parse_args()
+    output = args.output if args.cmd == "scrape" else f".{args.formato}"
+    if args.resume and output.endswith(".parquet"):
+        parser.error("--resume no está disponible para salidas .parquet (el archivo se escribe al finalizar)")
+
+    if args.cmd == "scrape-all":
+        categorias = [c.strip() for c in args.categorias.split(",") if c.strip()]
+        invalid = [c for c in categorias if c not in EXPECTED_URLS]
+        if invalid:
+            parser.error(f"Categorías no soportadas: {', '.join(invalid)}")
+
+    scraper = _make_scraper(args)
+    # Parquet no admite --resume: un checkpoint nunca se usaría
+    use_checkpoint = not output.endswith(".parquet")
+
+    def run() -> int:
+        if args.cmd == "scrape":
+            repo = _make_repo(args.output, delta=bool(args.delta))
+            usecase = ScrapeCategoryUseCase(scraper, repo, workers=max(1, int(args.workers)),
+                                            checkpoint=JsonCheckpointAdapter(args.output, args.categoria) if use_checkpoint else None,
+                                            resume=args.resume)
+            usecase.run(args.categoria, pages=args.paginas)
+            return 0
+
+        usecase = ScrapeAllCategoriesUseCase(scraper, lambda c: _make_repo(f"{c}.{args.formato}", delta=bool(args.delta)),
+                                             workers=max(1, int(args.workers)),
+                                             checkpoint_factory=(lambda c: JsonCheckpointAdapter(f"{c}.{args.formato}", c))
+                                             if use_checkpoint else None,
+                                             resume=args.resume)
+        errors = usecase.run(categorias, pages=args.paginas)
+        for categoria, e in errors.items():
+            print(f"Error en categoría {categoria}: {e}")
+        return 1 if errors else 0
 
-    if args.cmd == "scrape":
-        scraper = ExitoScraperAdapter()
-        repo = _make_repo(args.output)
-        usecase = ScrapeCategoryUseCase(scraper, repo)
-        usecase.run(args.categoria, pages=max(1, int(args.paginas)))
+    # Métricas, reporte y perfil envuelven la corrida completa, también si falla
+    stem = Path(args.output).name if args.cmd == "scrape" else "scrape-all"
+    profiler = cProfile.Profile() if args.profile is not None else None
+    METRICS.reset()
+    status = "error"
+    try:
+        code = profiler.runcall(run) if profiler else run()
+        status = "ok" if code == 0 else "error"
+    except KeyboardInterrupt:
+        status = "interrumpido"
+        raise
+    except Exception as e:
+        status = f"error: {e}"
+        raise
+    finally:
+        _write_run_report(args, scraper, stem, status)
+        if profiler is not None:
+            _dump_profile(profiler, Path(args.profile) if args.profile else DATA_DIR / f"{stem}.prof")
+    if code:
+        sys.exit(code)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,118 @@
+"""
+Apertura transparente de archivos comprimidos (.gz / .zst) por su extensión
+"""
+import gzip
+import io
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Generator, Iterator, TextIO, Tuple
+
+from ..config import GZIP_LEVEL, ZSTD_LEVEL
+
+try:  # dependencia opcional: pip install zstandard
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = (".gz", ".zst")
+
+
+def split_compression(path) -> Tuple[Path, str]:
+    """("datos.jsonl.gz") -> (Path("datos.jsonl"), ".gz"); sin compresión el sufijo es ""."""
+    path = Path(path)
+    if path.suffix in COMPRESSION_SUFFIXES:
+        return path.with_suffix(""), path.suffix
+    return path, ""
+
+
+def open_binary(path, mode: str = "rb") -> BinaryIO:
+    """
+    Abre path en modo binario ("rb", "wb" o "ab") comprimiendo o descomprimiendo
+    en streaming según la extensión. Al leer, los archivos con varios
+    miembros/frames (escritos en corridas sucesivas) se leen completos.
+    """
+    suffix = split_compression(path)[1]
+    if suffix == ".gz":
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL)
+    if suffix == ".zst":
+        if zstandard is None:
+            raise ImportError("Los archivos .zst requieren zstandard: pip install zstandard")
+        fh = open(path, mode)
+        if mode.startswith("r"):
+            return zstandard.ZstdDecompressor().stream_reader(fh, read_across_frames=True, closefd=True)
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(fh, closefd=True)
+    return open(path, mode)
+
+
+def open_text(path, mode: str = "r") -> TextIO:
+    """Como open_binary, pero en texto UTF-8 ("r", "w" o "a")."""
+    if not split_compression(path)[1]:
+        return open(path, mode, encoding="utf-8")
+    return io.TextIOWrapper(open_binary(path, mode + "b"), encoding="utf-8")
+
+
+def iter_decompressed(path, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    """
+    Contenido descomprimido por bloques, tolerando una cola truncada (archivo
+    de una corrida interrumpida): se entrega todo lo que alcanzó a vaciarse.
+    """
+    if not split_compression(path)[1]:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    yield from _iter_members(path, chunk_size)
+
+
+def inspect_stream(path) -> Tuple[int, bool]:
+    """
+    (bytes descomprimidos legibles, True si el último miembro .gz o frame .zst
+    está completo). Un stream incompleto viene de una corrida interrumpida:
+    agregarle otro miembro detrás lo deja ilegible.
+    """
+    if not split_compression(path)[1]:
+        return Path(path).stat().st_size, True
+    size = 0
+    members = _iter_members(path, 1 << 20)
+    while True:
+        try:
+            size += len(next(members))
+        except StopIteration as done:
+            return size, done.value
+
+
+def _decompressor(suffix: str):
+    if suffix == ".gz":
+        return zlib.decompressobj(wbits=31)
+    if zstandard is None:
+        raise ImportError("Los archivos .zst requieren zstandard: pip install zstandard")
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+def _iter_members(path, chunk_size: int) -> Generator[bytes, None, bool]:
+    """
+    Descomprime miembro a miembro (gzip.GzipFile y stream_reader lanzan error
+    sin entregar lo último decodificado). Retorna si el último quedó completo.
+    """
+    suffix = split_compression(path)[1]
+    with open(path, "rb") as fh:
+        d = _decompressor(suffix)
+        fed = False
+        while True:
+            buf = fh.read(chunk_size)
+            if not buf:
+                tail = d.flush()
+                if tail:
+                    yield tail
+                return d.eof or not fed
+            while buf:
+                if d.eof:
+                    # Siguiente miembro/frame (cada corrida agrega uno)
+                    d = _decompressor(suffix)
+                fed = True
+                out = d.decompress(buf)
+                if out:
+                    yield out
+                buf = d.unused_data if d.eof else b""
@@ -3,11 +3,97 @@ Utilidades para formateo y limpieza de datos
 """
 import re
 import html
+from functools import lru_cache
 from typing import Optional
 
+# Tabla de traducción de etiquetas para la pasada única: cada grupo del regex
+# combinado produce el texto de la misma posición en _TAG_OUTPUT. El orden de
+# las alternativas respeta el de las pasadas originales (br antes que b) y el
+# último grupo es el "remover todas las demás etiquetas".
+_TAG_RE = re.compile(
+    r'<(?:'
+    r'(p[^>]*|/p|div[^>]*|/div|br[^>]*|ul[^>]*|/ul|ol[^>]*|/ol)'
+    r'|(li[^>]*)'
+    r'|(h[1-6][^>]*)'
+    r'|(/h[1-6])'
+    r'|(strong[^>]*|/strong|b[^>]*|/b)'
+    r'|(em[^>]*|/em|i[^>]*|/i)'
+    r'|([^>]+)'
+    r')>',
+    re.IGNORECASE,
+)
+_TAG_OUTPUT = (None, '\n', '\n• ', '\n=== ', ' ===\n', '**', '*', '')
+# Un "<" dentro de otra etiqueta: las pasadas sucesivas podrían no coincidir
+_NESTED_LT_RE = re.compile(r'<[^>]*<')
+
+_SPACES_RE = re.compile(r'[ \t]{2,}|\t')
+
+CLEAN_CACHE_SIZE = 4096
+
+
+def _translate_tag(m: 're.Match[str]') -> str:
+    return _TAG_OUTPUT[m.lastindex]
+
+
+def _join_lines(text: str) -> str:
+    """
+    Equivale a las pasadas de espacios originales sobre un texto sin espacios
+    en los extremos: entre dos líneas con contenido queda un salto si estaban
+    seguidas y nada si había líneas en blanco en medio (las pasadas
+    originales terminan uniéndolas).
+    """
+    out = []
+    gap = 0
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            gap += 1
+            continue
+        if out:
+            out.append('\n' if gap == 0 else '')
+        out.append(line)
+        gap = 0
+    return ''.join(out)
+
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
 def clean_html_details(html_text: str) -> str:
     """
     Limpia y formatea el HTML de detalles adicionales para mejor legibilidad
+
+    Traduce todas las etiquetas en una sola pasada (mismo resultado que
+    clean_html_details_sequential) y memoriza las descripciones repetidas.
+
+    Args:
+        html_text: Texto HTML crudo
+
+    Returns:
+        Texto limpio y formateado
+    """
+    if not html_text or html_text.strip() == "":
+        return ""
+
+    # Decodificar entidades HTML
+    text = html.unescape(html_text)
+    if '<' in text:
+        if _NESTED_LT_RE.search(text):
+            return clean_html_details_sequential(html_text)
+        text = _TAG_RE.sub(_translate_tag, text)
+
+    # Limpiar espacios en blanco excesivos
+    text = text.strip()
+    if '\n' in text:
+        text = _join_lines(text)
+    if '\t' in text or '  ' in text:
+        text = _SPACES_RE.sub(' ', text)
+    return text
+
+
+def clean_html_details_sequential(html_text: str) -> str:
+    """
+    Implementación original (un re.sub por etiqueta). Se conserva como
+    referencia y para entradas con "<" sueltos, donde el orden de las
+    pasadas cambia el resultado
     
     Args:
         html_text: Texto HTML crudo
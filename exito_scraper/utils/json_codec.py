@@ -0,0 +1,99 @@
+"""
+Codec JSON del scraper: orjson o msgspec si están instalados, con la
+librería estándar como respaldo. Decodifica directamente desde bytes (p. ej.
+response.content) y codifica líneas JSONL como bytes UTF-8.
+
+Todos los backends producen el mismo texto (salvo la notación de exponentes
+en floats, p. ej. 1e16 frente a 1e+16): JSON compacto sin escapar caracteres
+no ASCII, o indentado a 2 espacios como json.dumps(indent=2, ensure_ascii=False).
+Los errores de decodificación siempre son json.JSONDecodeError.
+"""
+import json
+from typing import Any, Union
+
+from ..config import JSON_BACKEND
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+_AVAILABLE = {"orjson": orjson is not None, "msgspec": msgspec is not None, "json": True}
+
+
+def _select_backend(name: str) -> str:
+    if name == "auto":
+        return next(b for b in ("orjson", "msgspec", "json") if _AVAILABLE[b])
+    if name not in _AVAILABLE:
+        print(f"EXITO_JSON_BACKEND desconocido: {name!r}; se usa la librería estándar")
+        return "json"
+    if not _AVAILABLE[name]:
+        print(f"{name} no está instalado; se usa la librería estándar")
+        return "json"
+    return name
+
+
+# Backend en uso: "orjson", "msgspec" o "json"
+BACKEND = _select_backend(JSON_BACKEND)
+
+_STD_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_STD_PRETTY = json.JSONEncoder(ensure_ascii=False, indent=2)
+if BACKEND == "msgspec":
+    _MSGSPEC_ENCODER = msgspec.json.Encoder()
+    _MSGSPEC_DECODER = msgspec.json.Decoder()
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decodifica JSON desde bytes (UTF-8) o str."""
+    if BACKEND == "orjson":
+        # orjson.JSONDecodeError es subclase de json.JSONDecodeError
+        return orjson.loads(data)
+    if BACKEND == "msgspec":
+        try:
+            return _MSGSPEC_DECODER.decode(data)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), data if isinstance(data, str) else "", 0) from None
+    # json.loads acepta str, bytes y bytearray, pero no memoryview
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """JSON compacto en UTF-8."""
+    try:
+        if BACKEND == "orjson":
+            return orjson.dumps(obj)
+        if BACKEND == "msgspec":
+            return _MSGSPEC_ENCODER.encode(obj)
+    except (TypeError, ValueError, OverflowError):
+        # Claves no str, enteros de más de 64 bits, etc.: los acepta la librería estándar
+        pass
+    return _STD_ENCODER.encode(obj).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """JSON compacto como str."""
+    if BACKEND == "json":
+        return _STD_ENCODER.encode(obj)
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Una línea JSONL (JSON compacto más salto de línea) en UTF-8."""
+    return dumps_bytes(obj) + b"\n"
+
+
+def dumps_pretty(obj: Any) -> str:
+    """Igual que json.dumps(obj, indent=2, ensure_ascii=False)."""
+    try:
+        if BACKEND == "orjson":
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+        if BACKEND == "msgspec":
+            return msgspec.json.format(_MSGSPEC_ENCODER.encode(obj), indent=2).decode("utf-8")
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return _STD_PRETTY.encode(obj)
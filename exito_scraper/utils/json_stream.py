@@ -0,0 +1,138 @@
+"""
+Lectura y escritura de JSON/JSONL en streaming y procesamiento por lotes en
+varios procesos, para archivos que no caben (o no conviene cargar) en memoria
+"""
+import json
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Iterable, Iterator, List, TextIO, Tuple
+
+from .json_codec import dumps_pretty
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_lines(f: TextIO) -> Iterator[Tuple[int, str]]:
+    """(número de línea, línea) de un JSONL, omitiendo líneas vacías."""
+    for line_num, line in enumerate(f, 1):
+        line = line.strip()
+        if line:
+            yield line_num, line
+
+
+def iter_json_array(f: TextIO, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Elementos de un arreglo JSON leídos de forma incremental: en memoria solo
+    queda el elemento en curso. Si el documento no es un arreglo, se entrega
+    el documento completo como único elemento.
+    """
+    buf, pos, eof = "", 0, False
+    while True:
+        # Espacios iniciales (pueden ocupar más de un bloque)
+        pos = _skip(buf, pos)
+        if pos < len(buf) or eof:
+            break
+        buf, pos = f.read(chunk_size), 0
+        eof = not buf
+    if pos == len(buf) or buf[pos] != "[":
+        yield json.loads(buf[pos:] + f.read())
+        return
+    pos += 1
+    while True:
+        pos = _skip(buf, pos, ",")
+        if pos == len(buf):
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buf, pos)
+            buf, pos = f.read(chunk_size), 0
+            eof = not buf
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = _DECODER.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Elemento incompleto: se agrega otro bloque (o es un error real al final)
+            if eof:
+                raise
+            more = f.read(chunk_size)
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+            continue
+        nxt = _skip(buf, end)
+        if nxt == len(buf) or buf[nxt] not in ",]":
+            # Sin delimitador a la vista: un número al final del bloque ("-3e")
+            # puede continuar en el siguiente
+            if eof:
+                if nxt < len(buf):
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buf, nxt)
+            else:
+                more = f.read(chunk_size)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+        yield item
+        pos = end
+        if pos > chunk_size:
+            buf = buf[pos:]
+            pos = 0
+
+
+def _skip(buf: str, pos: int, extra: str = "") -> int:
+    chars = _WHITESPACE + extra
+    while pos < len(buf) and buf[pos] in chars:
+        pos += 1
+    return pos
+
+
+def format_array_item(obj: Any) -> str:
+    """Texto de obj tal como aparece dentro de json.dump(lista, indent=2)."""
+    return dumps_pretty(obj).replace("\n", "\n  ")
+
+
+class JsonArrayWriter:
+    """
+    Escribe un arreglo JSON elemento a elemento con la misma salida que
+    json.dump(lista, f, indent=2, ensure_ascii=False).
+    """
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.count = 0
+
+    def write(self, obj: Any) -> None:
+        self.write_formatted(format_array_item(obj))
+
+    def write_formatted(self, item: str) -> None:
+        """item ya formateado con format_array_item (p. ej. en otro proceso)."""
+        self.f.write(("[\n  " if not self.count else ",\n  ") + item)
+        self.count += 1
+
+    def close(self) -> None:
+        self.f.write("\n]" if self.count else "[]")
+
+
+def map_batches(fn: Callable[[List[Any]], List[Any]], items: Iterable[Any],
+                workers: int = 1, batch_size: int = 500) -> Iterator[Any]:
+    """
+    Aplica fn a lotes de items en workers procesos y entrega los resultados
+    en el orden original. Solo hay 2 * workers lotes en vuelo: la memoria no
+    depende del tamaño de la entrada. fn debe poder serializarse (pickle).
+    """
+    items = iter(items)
+    batches = iter(lambda: list(islice(items, batch_size)), [])
+    if workers <= 1:
+        for batch in batches:
+            yield from fn(batch)
+        return
+    window: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in batches:
+            window.append(pool.submit(fn, batch))
+            if len(window) >= 2 * workers:
+                yield from window.popleft().result()
+        while window:
+            yield from window.popleft().result()
@@ -0,0 +1,198 @@
+"""
+Métricas de la corrida: contadores e histogramas de latencia por etapa, con
+reporte JSON y archivo de texto para Prometheus (node_exporter textfile collector)
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..config import METRICS_LATENCY_BUCKETS, METRICS_MAX_SAMPLES
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    """Buckets acumulables (Prometheus) más una muestra acotada (reservoir) para percentiles."""
+
+    def __init__(self, buckets: Tuple[float, ...] = METRICS_LATENCY_BUCKETS, max_samples: int = METRICS_MAX_SAMPLES):
+        self.buckets = buckets
+        self.max_samples = max_samples
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._samples: List[float] = []
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        if len(self._samples) < self.max_samples:
+            self._samples.append(value)
+        else:
+            j = random.randrange(self.count)
+            if j < self.max_samples:
+                self._samples[j] = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Percentil por rango más cercano sobre la muestra (q entre 0 y 1)."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "p50": _round(self.quantile(0.5)),
+            "p95": _round(self.quantile(0.95)),
+            "p99": _round(self.quantile(0.99)),
+            "max": round(self.max, 6),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 6) if value is not None else None
+
+
+class Metrics:
+    """
+    Registro de métricas compartido entre hilos. Los nombres siguen la
+    convención de Prometheus (sufijo _total en contadores, _seconds en
+    histogramas) y admiten etiquetas como argumentos con nombre:
+
+        METRICS.inc("http_requests_total", endpoint="search", status=200)
+        with METRICS.timer("stage_seconds", stage="persist"):
+            ...
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters: Dict[_Key, float] = {}
+            self._histograms: Dict[_Key, Histogram] = {}
+            self.started = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> _Key:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """{"counters": {"nombre{etiqueta=valor}": n}, "histograms": {...: resumen}}"""
+        with self._lock:
+            return {
+                "counters": {_render(k): v for k, v in sorted(self._counters.items())},
+                "histograms": {_render(k): h.summary() for k, h in sorted(self._histograms.items())},
+            }
+
+    def write_report(self, path, **info) -> Path:
+        """Reporte JSON de la corrida: info adicional (comando, estado...) más las métricas."""
+        finished = time.time()
+        report = {
+            "inicio": _iso(self.started),
+            "fin": _iso(finished),
+            "duracion_segundos": round(finished - self.started, 3),
+            **info,
+            **self.snapshot(),
+        }
+        return _write_atomic(path, json.dumps(report, indent=2, ensure_ascii=False, default=str))
+
+    def write_prometheus(self, path, prefix: str = "exito_") -> Path:
+        """Formato de texto de Prometheus; se reemplaza atómicamente para el textfile collector."""
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} counter")
+                typed.add(name)
+            lines.append(f"{prefix}{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), hist in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{prefix}{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{prefix}{name}_sum{_labels(labels)} {hist.sum:.6f}")
+            lines.append(f"{prefix}{name}_count{_labels(labels)} {hist.count}")
+        lines.append(f"# TYPE {prefix}run_timestamp_seconds gauge")
+        lines.append(f"{prefix}run_timestamp_seconds {time.time():.0f}")
+        return _write_atomic(path, "\n".join(lines) + "\n")
+
+
+def _render(key: _Key) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _iso(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(ts))
+
+
+def _write_atomic(path, text: str) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+# Registro global de la corrida (lo usan el transporte, el scraper, los casos de uso y los repositorios)
+METRICS = Metrics()
@@ -0,0 +1,143 @@
+"""
+Extracción de tarjetas de producto desde el HTML de una página de categoría
+(fallback cuando la API VTEX no responde)
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import lxml.html
+from lxml import etree
+from bs4 import BeautifulSoup
+
+
+def _has_class(name: str) -> str:
+    """Equivalente XPath del selector CSS .name (token dentro de @class)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# XPath compilados una sola vez. Mismo orden y semántica que los selectores
+# CSS de la versión BeautifulSoup: a[href*='/p'], img, .price, .selling-price,
+# [class*='price'], [data-testid*='price'] (primer descendiente en orden del documento)
+_ANCHORS = etree.XPath("//a[contains(@href, '/p')]")
+_FIRST_IMG = etree.XPath("(.//img)[1]")
+_PRICE_SELECTORS = tuple(etree.XPath(f"(.//*[{cond}])[1]") for cond in (
+    _has_class("price"),
+    _has_class("selling-price"),
+    "contains(@class, 'price')",
+    "contains(@data-testid, 'price')",
+))
+# Texto como get_text(): sin comentarios ni contenido de <script>/<style>
+_TEXT = etree.XPath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+
+
+def _card(base_host: str, title: str, link: str, image: str, price_text: str) -> Dict[str, Any]:
+    return {
+        "name": title,
+        "brand": "",
+        "price": None,
+        "currency": None,
+        "image": (base_host + image) if image and image.startswith("/") else image,
+        "link": (base_host + link) if link.startswith("/") else link,
+        "rating": "",
+        "details": "",
+        "price_text": price_text,
+    }
+
+
+def _iter_cards_lxml(page: str, base_host: str) -> Iterator[Dict[str, Any]]:
+    root = lxml.html.document_fromstring(page)
+    for card in _ANCHORS(root):
+        title = (card.get("title") or "").strip()
+        link = card.get("href") or ""
+        if not link or not title:
+            continue
+        container = card.getparent()
+
+        img = _FIRST_IMG(card)
+        image = (img[0].get("src") or img[0].get("data-src") or "") if img else ""
+
+        price_text = ""
+        for selector in _PRICE_SELECTORS:
+            found = selector(card) or (selector(container) if container is not None else [])
+            if found:
+                price_text = "".join(t.strip() for t in _TEXT(found[0]))
+                break
+
+        yield _card(base_host, title, link, image, price_text)
+
+
+def _product_url(link: str) -> str:
+    """Link sin query ni fragmento: las tarjetas repiten el anchor (imagen, título) con distintos parámetros."""
+    parts = urlsplit(link)
+    return f"{parts.netloc}{parts.path}"
+
+
+def dedup_cards(cards: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Un item por producto, en el orden de su primer anchor. Si el primero no
+    trae imagen o precio, se completan con los de anchors repetidos.
+    """
+    by_url: Dict[str, Dict[str, Any]] = {}
+    for card in cards:
+        first = by_url.setdefault(_product_url(card["link"]), card)
+        if first is not card:
+            for field in ("image", "price_text"):
+                if not first[field] and card[field]:
+                    first[field] = card[field]
+    return list(by_url.values())
+
+
+def parse_product_cards(page: str, base_host: str) -> List[Dict[str, Any]]:
+    """
+    Tarjetas de producto (a[href*='/p'] con title) de una página de categoría,
+    con lxml y XPath compilados y sin anchors repetidos para un mismo producto.
+    """
+    if not page or not page.strip():
+        return []
+    try:
+        cards = list(_iter_cards_lxml(page, base_host))
+    except (etree.ParserError, ValueError):
+        # p. ej. str con declaración de encoding XML: el parser tolerante de bs4 lo acepta
+        cards = parse_product_cards_soup(page, base_host)
+    return dedup_cards(cards)
+
+
+def parse_product_cards_soup(page: str, base_host: str) -> List[Dict[str, Any]]:
+    """Implementación original con BeautifulSoup (sin deduplicar); referencia para benchmarks."""
+    soup = BeautifulSoup(page, "lxml")
+    items: List[Dict[str, Any]] = []
+    # Selector genérico para catálogos (ajustable)
+    for card in soup.select("a[href*='/p']"):
+        # Evita anchors vacíos
+        title_raw = card.get("title") or ""
+        title = (title_raw[0] if isinstance(title_raw, list) and title_raw else str(title_raw)).strip()
+        link = card.get("href") or ""
+        if not link or not title:
+            continue
+
+        # Sube al contenedor para buscar precio/imagen/brand si están cerca
+        container = card.parent
+        price_text = ""
+        img = card.select_one("img")
+        if img and (img.get("src") or img.get("data-src")):
+            image = img.get("src") or img.get("data-src")
+        else:
+            image = ""
+
+        # heurística para precio visible en el contenedor
+        price_el: Optional[Any] = None
+        for sel in [".price", ".selling-price", "[class*='price']", "[data-testid*='price']"]:
+            price_el = card.select_one(sel) or (container.select_one(sel) if container else None)
+            if price_el:
+                break
+        if price_el:
+            price_text = price_el.get_text(strip=True)
+
+        # Ensure link is a string
+        link_str = link[0] if isinstance(link, list) and link else str(link)
+
+        # Ensure image is a string
+        image_str = image[0] if isinstance(image, list) and image else str(image) if image else ""
+
+        items.append(_card(base_host, title, link_str, image_str, price_text))
+    return items
@@ -0,0 +1,115 @@
+"""
+Extracción rápida de calificaciones desde el HTML de la página de producto
+"""
+import re
+import json
+import html
+from typing import Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+NO_RATING = "No tiene Calificacion"
+
+_JSON_LD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+_TAG_RE = re.compile(r'<[^>]+>')
+# Bloques cuyo contenido no es texto visible: soup.get_text() tampoco los incluye
+# (en los scripts de estado de VTEX aparecen "N opiniones" de otros productos)
+_HIDDEN_RE = re.compile(r'<(script|style|template)\b[^>]*>.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+
+# Mismos patrones que se aplican sobre el texto de la página
+_RATING_RE = re.compile(r'(\d+\.?\d*)\s*Calificación\s+promedio\s+entre\s+(\d+)\s+opiniones', re.IGNORECASE)
+_ALT_RE = re.compile(r'(\d+\.?\d*)\s*de\s+5\s+estrellas.*?(\d+)\s+opiniones', re.IGNORECASE)
+_REVIEWS_RE = re.compile(r'(\d+)\s+[Oo]piniones')
+_HINT_RE = re.compile(r'opiniones', re.IGNORECASE)
+
+
+def _find_aggregate_rating(node) -> Optional[dict]:
+    if isinstance(node, dict):
+        agg = node.get("aggregateRating")
+        if isinstance(agg, dict):
+            return agg
+        for v in node.values():
+            found = _find_aggregate_rating(v)
+            if found:
+                return found
+    elif isinstance(node, list):
+        for v in node:
+            found = _find_aggregate_rating(v)
+            if found:
+                return found
+    return None
+
+
+def _from_json_ld(page: str) -> Optional[Tuple[str, str]]:
+    """Busca aggregateRating en los bloques JSON-LD (schema.org) del documento."""
+    if "aggregateRating" not in page:
+        return None
+    for m in _JSON_LD_RE.finditer(page):
+        block = m.group(1)
+        if "aggregateRating" not in block:
+            continue
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        agg = _find_aggregate_rating(data)
+        if not agg or agg.get("ratingValue") in (None, ""):
+            continue
+        count = agg.get("reviewCount", agg.get("ratingCount", 0))
+        return str(agg["ratingValue"]), str(count or 0)
+    return None
+
+
+def _match_text(text: str) -> Optional[Tuple[str, str]]:
+    m = _RATING_RE.search(text)
+    if m:
+        return m.group(1), m.group(2)
+    m = _ALT_RE.search(text)
+    if m:
+        return m.group(1), m.group(2)
+    m = _REVIEWS_RE.search(text)
+    if m:
+        return NO_RATING, m.group(1)
+    return None
+
+
+def extract_rating_soup(page: str) -> Tuple[str, str]:
+    """
+    Ruta completa: construye el árbol con BeautifulSoup y aplica los patrones
+    sobre todo el texto. Es la implementación de referencia (lenta).
+    """
+    soup = BeautifulSoup(page, 'html.parser')
+    return _match_text(soup.get_text()) or (NO_RATING, "0")
+
+
+def extract_rating(page: str) -> Tuple[str, str]:
+    """
+    Extrae (rating, review_count) del HTML de un producto.
+
+    1. JSON-LD aggregateRating.
+    2. Patrones de texto sobre el HTML sin etiquetas ni scripts/estilos
+       (sin construir árbol).
+    3. BeautifulSoup solo si el documento menciona opiniones pero los pasos
+       anteriores no encontraron nada.
+    """
+    found = _from_json_ld(page)
+    if found:
+        return found
+
+    if not _HINT_RE.search(page):
+        return NO_RATING, "0"
+
+    text = _TAG_RE.sub("", _HIDDEN_RE.sub("", page))
+    if not _HINT_RE.search(text):
+        # "opiniones" solo aparecía dentro de scripts o estilos
+        return NO_RATING, "0"
+    if "&" in text:
+        text = html.unescape(text)
+    found = _match_text(text)
+    if found:
+        return found
+
+    return extract_rating_soup(page)
@@ -0,0 +1,73 @@
+"""
+Extracción del estado JSON embebido (SSR) en el HTML de una página de categoría
+"""
+import json
+import re
+from typing import Dict, Optional
+
+# __APOLLO_STATE__ contiene "__STATE__": una sola alternativa cubre ambos
+_MARKER_RE = re.compile(r"__(?:APOLLO_)?STATE__|__NEXT_DATA__")
+# Entre el marcador y la "{" del objeto:
+#   __STATE__ = {...}            window.__APOLLO_STATE__={...}
+#   "__NEXT_DATA__": {...}       <script id="__NEXT_DATA__" type="application/json">{...}
+#   <template data-varname="__STATE__"><script>{...}   (VTEX IO)
+_VALUE_START_RE = re.compile(r"""(?:["']?\s*[=:]\s*|["'][^<>{]{0,200}>\s*(?:<script[^>]*>\s*)?)(?=\{)""")
+# strict=False acepta saltos de línea y tabs sin escapar dentro de strings
+_DECODER = json.JSONDecoder(strict=False)
+_PRIORITY = ("__STATE__", "__APOLLO_STATE__", "__NEXT_DATA__")
+
+
+def extract_state_json(page: str) -> Optional[dict]:
+    """
+    Objeto de estado embebido (__STATE__, __APOLLO_STATE__ o __NEXT_DATA__,
+    en ese orden de preferencia) o None. Una sola pasada por el documento:
+    cada marcador se decodifica en su posición con raw_decode, que lee el
+    objeto completo (con sus llaves anidadas) y se detiene al cerrarlo.
+    """
+    found: Dict[str, dict] = {}
+    for m in _MARKER_RE.finditer(page):
+        marker = m.group(0)
+        if marker in found:
+            continue
+        start = _VALUE_START_RE.match(page, m.end())
+        if start is None:
+            continue
+        try:
+            state, _ = _DECODER.raw_decode(page, start.end())
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(state, dict) or not state:
+            # Un objeto vacío (p. ej. "__APOLLO_STATE__": {}) no es el estado buscado
+            continue
+        if marker == _PRIORITY[0]:
+            return state
+        found[marker] = state
+    for marker in _PRIORITY:
+        if marker in found:
+            return found[marker]
+    return None
+
+
+def extract_state_json_regex(page: str) -> Optional[dict]:
+    """Implementación original con regex no codiciosos; referencia para benchmarks."""
+    # Busca llaves típicas de estado embebido
+    # 1) __STATE__ = {...};  2) __APOLLO_STATE__ = {...};  3) __NEXT_DATA__ = {...}
+    patterns = [
+        r"__STATE__\s*=\s*(\{.*?\})\s*;\s*</script>",
+        r"__APOLLO_STATE__\s*=\s*(\{.*?\})\s*;\s*</script>",
+        r'"__NEXT_DATA__"\s*:\s*(\{.*?\})\s*,\s*"__APOLLO_STATE__"',
+        r'"__NEXT_DATA__"\s*:\s*(\{.*?\})\s*<\/script>',
+    ]
+    for pat in patterns:
+        m = re.search(pat, page, re.DOTALL)
+        if m:
+            try:
+                return json.loads(m.group(1))
+            except json.JSONDecodeError:
+                # Algunos sitios minifican con caracteres no estándar; intenta limpieza básica
+                cleaned = m.group(1).replace("\n", "").replace("\t", "")
+                try:
+                    return json.loads(cleaned)
+                except Exception:
+                    continue
+    return None
@@ -1,19 +1,29 @@
 #!/usr/bin/env python3
 """
 Script para convertir archivos JSONL a JSON formateado
+(también lee .jsonl.gz / .jsonl.zst; la salida conserva la compresión)
 """
 import json
+import os
 import sys
 from pathlib import Path
+from exito_scraper.utils.compression import open_text, split_compression
+from exito_scraper.utils.json_codec import loads
+from exito_scraper.utils.json_stream import JsonArrayWriter, format_array_item, iter_lines, map_batches
 
-def jsonl_to_formatted_json(jsonl_file: str, output_file: str | None = None):
+def jsonl_to_formatted_json(jsonl_file: str, output_file: str | None = None, workers: int | None = None):
     """
     Convierte un archivo JSONL a JSON formateado
-    
+
+    Procesa el archivo en streaming (memoria constante) y formatea las líneas
+    por lotes en varios procesos, conservando el orden.
+
     Args:
         jsonl_file: Ruta al archivo JSONL
         output_file: Ruta del archivo de salida (opcional)
+        workers: Procesos para el formateo (por defecto, uno por CPU)
     """
+    workers = workers or os.cpu_count() or 1
     jsonl_path = Path(jsonl_file)
     
     if not jsonl_path.exists():
@@ -22,26 +32,21 @@ def jsonl_to_formatted_json(jsonl_file: str, output_file: str | None = None):
     
     # Generar nombre de archivo de salida si no se proporciona
     if output_file is None:
-        output_file = str(jsonl_path.with_name(jsonl_path.stem + '_formatted.json'))
+        base, compression = split_compression(jsonl_path)
+        output_file = str(base.with_name(base.stem + '_formatted.json' + compression))
     
     try:
-        # Leer el archivo JSONL
-        productos = []
-        with open(jsonl_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if line:
-                    try:
-                        productos.append(json.loads(line))
-                    except json.JSONDecodeError as e:
-                        print(f"Error en línea {line_num}: {e}")
-                        continue
-        
-        # Escribir archivo JSON formateado
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(productos, f, indent=2, ensure_ascii=False)
-        
-        print(f"Convertido: {len(productos)} productos")
+        # Leer el JSONL y escribir el arreglo formateado elemento a elemento
+        with open_text(jsonl_path, 'r') as src, open_text(output_file, 'w') as out:
+            writer = JsonArrayWriter(out)
+            for line_num, item, error in map_batches(_format_batch, iter_lines(src), workers=workers):
+                if error:
+                    print(f"Error en línea {line_num}: {error}")
+                    continue
+                writer.write_formatted(item)
+            writer.close()
+
+        print(f"Convertido: {writer.count} productos")
         print(f"Archivo original: {jsonl_file}")
         print(f"Archivo formateado: {output_file}")
         
@@ -51,13 +56,33 @@ def jsonl_to_formatted_json(jsonl_file: str, output_file: str | None = None):
         print(f"Error durante la conversión: {e}")
         return False
 
+def _format_batch(batch: list) -> list:
+    """
+    Parsea y formatea un lote de (línea, texto) en un proceso worker;
+    retorna (línea, elemento formateado, error).
+    """
+    results = []
+    for line_num, line in batch:
+        try:
+            results.append((line_num, format_array_item(loads(line)), None))
+        except json.JSONDecodeError as e:
+            results.append((line_num, None, str(e)))
+    return results
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso: python format_json.py <archivo_jsonl> [archivo_salida]")
+    args = sys.argv[1:]
+    workers = None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+
+    if len(args) < 1:
+        print("Uso: python format_json.py <archivo_jsonl> [archivo_salida] [--workers N]")
         print("Ejemplo: python format_json.py data/televisores.jsonl")
         sys.exit(1)
-    
-    jsonl_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    
-    jsonl_to_formatted_json(jsonl_file, output_file)
+
+    jsonl_file = args[0]
+    output_file = args[1] if len(args) > 1 else None
+
+    jsonl_to_formatted_json(jsonl_file, output_file, workers)